@@ -0,0 +1,3 @@
+""" Bernoulli multi-armed bandits and epsilon greedy agents of `02_IntroductionMultiarmed.ipynb`,
+as scalar versions and as versions which play many games at once
+"""
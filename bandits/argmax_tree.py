@@ -0,0 +1,55 @@
+import numpy as np
+
+
+class ArgmaxTree():
+    """ segment tree over a list of values which returns the index of the largest value
+
+    Every inner node stores the index of the largest value in its range, ties go to the
+    smaller index as in `list.index(max(values))`. Changing a value updates the path to
+    the root in O(log n), the argmax is read from the root in O(1).
+
+    :param values: initial values of shape `(n,)`
+    """
+
+    def __init__(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=np.float64)
+        assert values.ndim == 1 and values.size > 0, f"values has to be a non empty vector but is {values.shape}"
+        self.n = values.size
+        self.leaves = 1 << (self.n - 1).bit_length()
+        self.build(values)
+
+    def build(self, values: np.ndarray) -> None:
+        """ rebuild the whole tree from `values` level by level in O(n)
+        """
+        values = np.asarray(values, dtype=np.float64)
+        # padding leaves point to an extra value of -inf, which never wins
+        self.values = values.tolist() + [-np.inf]
+        keys = np.append(values, -np.inf)
+        tree = np.empty(2 * self.leaves, dtype=np.int64)
+        level = np.full(self.leaves, self.n, dtype=np.int64)
+        level[:self.n] = np.arange(self.n)
+        tree[self.leaves:] = level
+        width = self.leaves
+        while width > 1:
+            left, right = level[0::2], level[1::2]
+            level = np.where(keys[left] >= keys[right], left, right)
+            width //= 2
+            tree[width:2 * width] = level
+        self.tree = tree.tolist()
+
+    def argmax(self) -> int:
+        return self.tree[1]
+
+    def max(self) -> float:
+        return self.values[self.tree[1]]
+
+    def update(self, index: int, value: float) -> None:
+        """ set the value of `index` and repair the path to the root
+        """
+        values, tree = self.values, self.tree
+        values[index] = value
+        node = (index + self.leaves) >> 1
+        while node:
+            left, right = tree[2 * node], tree[2 * node + 1]
+            tree[node] = left if values[left] >= values[right] else right
+            node >>= 1
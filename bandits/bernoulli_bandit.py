@@ -0,0 +1,147 @@
+from typing import Optional
+
+import numpy as np
+
+from bandits.reward_tape import RewardTape
+from bandits.utils import is_positive_integer
+
+
+class BernoulliBanditEnv():
+    def __init__(self, p_parameter, max_steps, rng: Optional[np.random.Generator] = None,
+                 tape: Optional[np.ndarray] = None):
+        """create a multiarm bandit with `len(p_parameter)` arms
+
+        Args:
+            p_parameter (list): list containing mean parameter of bandit arms
+            max_steps (int): number of steps for the bandit problem
+            rng (np.random.Generator, optional): random generator of the rewards,
+                defaults to the global `np.random`
+            tape (np.ndarray, optional): pre-drawn rewards of shape `(max_steps, n_arms)`,
+                e.g. `RewardTape.game`, which are replayed instead of drawing rewards
+        """
+        # check if valid parameter were used
+        assert (np.array(p_parameter) < 1).all(
+        ), "Parameter p must be between 0 and 1."
+        assert (0 < np.array(p_parameter)).all(
+        ), "Parameter p must be between 0 and 1."
+        assert is_positive_integer(
+            max_steps), f"max_steps has to be a positive integer but is {max_steps}"
+        self.p_parameter = list(p_parameter)
+        self.n_arms = len(p_parameter)
+        self.max_steps = max_steps
+        self.count = 0
+        self.rng = rng if rng is not None else np.random
+        assert tape is None or np.shape(tape) == (max_steps, self.n_arms), \
+            f"tape has to be of shape {(max_steps, self.n_arms)} but is {np.shape(tape)}"
+        self.tape = tape
+
+        # to save regret statistics
+        self.optimal = [max(self.p_parameter),
+                        self.p_parameter.index(max(self.p_parameter))]
+        self.played_optimal = 0
+        self.regret = 0.0
+
+    def step(self, action):
+        """play a step of the multiarmed bandit, given an action
+
+        Args:
+            action (int): chosen arm
+
+        Returns:
+            list: next state, reward, info if done, game info
+        """
+        # check, if the action is valid
+        assert action in range(
+            self.n_arms), f"the action {action} is not valid"
+
+        # sample the reward, depending on the chosen arm
+        if self.tape is not None:
+            reward = float(self.tape[self.count, action])
+        elif self.rng.uniform() < self.p_parameter[action]:
+            reward = 1.0
+        else:
+            reward = 0.0
+
+        # set counter +1
+        self.count += 1
+
+        # check if best action was played
+        if action == self.optimal[1]:
+            self.played_optimal += 1
+
+        # update the regret in the game
+        self.regret += (self.optimal[0]-reward)
+
+        # if game is finished `done=True`
+        if self.count >= self.max_steps:
+            done = True
+        else:
+            done = False
+        return 0, reward, done, {}
+
+    def reset(self):
+        self.count = 0
+        self.regret = 0
+        self.played_optimal = 0
+
+
+class VectorBernoulliBanditEnv():
+    """ plays `num_games` Bernoulli bandit games of `BernoulliBanditEnv` in lockstep
+
+    All statistics are arrays over the games with the meaning of the attributes of
+    `BernoulliBanditEnv`: `regret` is the cumulative regret and `played_optimal` the
+    number of plays of the best arm.
+
+    :param p_parameter: mean parameter of the arms of all games, shape `(num_games, n_arms)`
+    :param max_steps: number of steps of every game
+    :param rng: random generator of the rewards
+    :param tape: pre-drawn rewards of all games which are replayed instead of drawing rewards
+    """
+
+    def __init__(self, p_parameter: np.ndarray, max_steps: int, rng: Optional[np.random.Generator] = None,
+                 tape: Optional[RewardTape] = None) -> None:
+        p_parameter = np.asarray(p_parameter, dtype=np.float64)
+        assert p_parameter.ndim == 2, \
+            f"p_parameter has to be of shape (num_games, n_arms) but is {p_parameter.shape}"
+        assert ((0 < p_parameter) & (p_parameter < 1)).all(), "Parameter p must be between 0 and 1."
+        assert is_positive_integer(max_steps), f"max_steps has to be a positive integer but is {max_steps}"
+        self.p_parameter = p_parameter
+        self.num_games, self.n_arms = p_parameter.shape
+        self.max_steps = max_steps
+        self.rng = rng if rng is not None else np.random.default_rng()
+        assert tape is None or (tape.num_games, tape.n_arms, tape.max_steps) == (self.num_games, self.n_arms, max_steps), \
+            "the tape does not match the games"
+        self.tape = tape
+        self._games = np.arange(self.num_games)
+
+        # to save regret statistics, ties go to the first best arm as in `BernoulliBanditEnv`
+        self.optimal_arm = np.argmax(p_parameter, axis=1)
+        self.optimal_mean = p_parameter[self._games, self.optimal_arm]
+        self.reset()
+
+    def step(self, actions: np.ndarray):
+        """ play one step in every game
+
+        Args:
+            actions (np.ndarray): chosen arms of shape `(num_games,)`
+
+        Returns:
+            tuple: states, rewards of shape `(num_games,)`, done flag of all games and info
+        """
+        actions = np.asarray(actions)
+        assert actions.shape == (self.num_games,), \
+            f"actions has to be of shape {(self.num_games,)} but is {actions.shape}"
+        if self.tape is not None:
+            rewards = self.tape.rewards(self.count, actions)
+        else:
+            rewards = (self.rng.random(self.num_games) < self.p_parameter[self._games, actions]).astype(np.float64)
+        self.count += 1
+        self.played_optimal += actions == self.optimal_arm
+        self.regret += self.optimal_mean - rewards
+        done = self.count >= self.max_steps
+        return np.zeros(self.num_games, dtype=np.int64), rewards, done, {}
+
+    def reset(self) -> None:
+        self.count = 0
+        self.regret = np.zeros(self.num_games)
+        self.played_optimal = np.zeros(self.num_games, dtype=np.int64)
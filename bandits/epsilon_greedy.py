@@ -0,0 +1,205 @@
+import random
+from typing import Optional, Union
+
+import numpy as np
+
+from bandits.argmax_tree import ArgmaxTree
+from bandits.utils import is_float_between_0_and_1, is_positive_integer
+
+
+class EpsilonGreedy():
+    """ class for epsilon greedy algorithm
+    """
+
+    def __init__(self, epsilon, n_arms, rng: Optional[np.random.Generator] = None):
+        """ initialize epsilon greedy algorithm
+
+        Args:
+            epsilon (float): epsilon parameter for the epsilon greedy algorithm
+            n_arms (int): number of possible arms
+            rng (np.random.Generator, optional): random generator of the exploration,
+                defaults to the global `random` module
+        """
+        assert is_positive_integer(
+            n_arms), f"{n_arms} should be a positive integer"
+        assert is_float_between_0_and_1(
+            epsilon), f"{epsilon} should be a float between 0 and 1"
+        self.epsilon = epsilon
+        self.n_arms = n_arms
+        if rng is None:
+            self._random, self._randrange = random.random, random.randrange
+        else:
+            self._random, self._randrange = rng.random, lambda n: int(rng.integers(n))
+        self.counts = [0 for _ in range(self.n_arms)]
+        self.values = [0.0 for _ in range(self.n_arms)]
+
+    def select_arm(self):
+        """ select the best arm given the estimators of the values
+
+        Returns:
+            int: best action based on the estimators of the values
+        """
+        if self._random() > self.epsilon:
+            max_value = max(self.values)
+            best_action = (self.values).index(max_value)
+            return best_action
+        return self._randrange(self.n_arms)
+
+    def update(self, chosen_arm, reward):
+        """ update the value estimators and counts based on the new observed
+          reward and played action
+
+        Args:
+            chosen_arm (int): action which was played
+            reward (float): reward of the multiarmed bandit, based on playing action `chosen_arm`
+        """
+        # increment the chosen arm
+        self.counts[chosen_arm] = self.counts[chosen_arm] + 1
+        times_played_chosen_arm = self.counts[chosen_arm]
+        value = self.values[chosen_arm]
+        # update via memory trick
+        new_value = ((times_played_chosen_arm - 1) / float(times_played_chosen_arm)
+                     ) * value + (1 / float(times_played_chosen_arm)) * reward
+        self.values[chosen_arm] = new_value
+
+    def reset(self):
+        """ reset agent by resetting all required statistics
+        """
+        self.counts = [0 for _ in range(self.n_arms)]
+        self.values = [0.0 for _ in range(self.n_arms)]
+
+
+class ScalableEpsilonGreedy():
+    """ epsilon greedy algorithm for very many arms
+
+    Counts and value estimators are numpy arrays, the best arm is maintained by an
+    `ArgmaxTree`. `select_arm` costs O(1) and `update` O(log n_arms) instead of O(n_arms)
+    of `EpsilonGreedy`, ties go to the first best arm as in `EpsilonGreedy`.
+
+    :param epsilon: epsilon parameter for the epsilon greedy algorithm
+    :param n_arms: number of possible arms
+    :param rng: random generator of the exploration, defaults to the global `random` module
+    """
+
+    def __init__(self, epsilon: float, n_arms: int, rng: Optional[np.random.Generator] = None) -> None:
+        assert is_positive_integer(n_arms), f"{n_arms} should be a positive integer"
+        assert is_float_between_0_and_1(epsilon), f"{epsilon} should be a float between 0 and 1"
+        self.epsilon = epsilon
+        self.n_arms = n_arms
+        if rng is None:
+            self._random, self._randrange = random.random, random.randrange
+        else:
+            self._random, self._randrange = rng.random, lambda n: int(rng.integers(n))
+        self.reset()
+
+    def select_arm(self) -> int:
+        """ select the best arm given the estimators of the values
+
+        Returns:
+            int: best action based on the estimators of the values
+        """
+        if self._random() > self.epsilon:
+            return self.tree.argmax()
+        return self._randrange(self.n_arms)
+
+    def update(self, chosen_arm: int, reward: float) -> None:
+        """ update the value estimator and count of the played arm in O(log n_arms)
+
+        Args:
+            chosen_arm (int): action which was played
+            reward (float): reward of the multiarmed bandit, based on playing action `chosen_arm`
+        """
+        self.counts[chosen_arm] += 1
+        times_played_chosen_arm = int(self.counts[chosen_arm])
+        # same rounding as `EpsilonGreedy.update`, so exact ties are broken identically
+        value = ((times_played_chosen_arm - 1) / float(times_played_chosen_arm)
+                 ) * float(self.values[chosen_arm]) + (1 / float(times_played_chosen_arm)) * reward
+        self.values[chosen_arm] = value
+        self.tree.update(chosen_arm, value)
+
+    def update_batch(self, chosen_arms: np.ndarray, rewards: np.ndarray) -> None:
+        """ apply many updates at once, equal to calling `update` for all pairs in order up to rounding
+
+        Every changed arm costs O(log n_arms), if more than `n_arms / log n_arms` arms
+        changed the tree is rebuilt in O(n_arms) instead.
+
+        Args:
+            chosen_arms (np.ndarray): played arms of shape `(n,)`
+            rewards (np.ndarray): observed rewards of shape `(n,)`
+        """
+        chosen_arms = np.asarray(chosen_arms, dtype=np.int64)
+        arms, inverse = np.unique(chosen_arms, return_inverse=True)
+        plays = np.bincount(inverse, minlength=arms.size)
+        reward_sums = np.bincount(inverse, weights=np.asarray(rewards, dtype=np.float64), minlength=arms.size)
+        old_counts = self.counts[arms]
+        self.counts[arms] = old_counts + plays
+        # the incremental mean over a batch equals the mean of the old sum and the new rewards
+        self.values[arms] = (self.values[arms] * old_counts + reward_sums) / self.counts[arms]
+        if arms.size * self.tree.leaves.bit_length() > self.n_arms:
+            self.tree.build(self.values)
+        else:
+            for arm, value in zip(arms.tolist(), self.values[arms].tolist()):
+                self.tree.update(arm, value)
+
+    def reset(self) -> None:
+        """ reset agent by resetting all required statistics
+        """
+        self.counts = np.zeros(self.n_arms, dtype=np.int64)
+        self.values = np.zeros(self.n_arms)
+        self.tree = ArgmaxTree(self.values)
+
+
+class VectorEpsilonGreedy():
+    """ epsilon greedy algorithm for `num_games` independent games at once
+
+    Counts and value estimators are arrays of shape `(num_games, n_arms)`. The arms are
+    chosen as in `EpsilonGreedy`: with probability `epsilon` uniformly at random, otherwise
+    the first arm with the largest estimated value.
+
+    :param epsilon: exploration probability, a float or one per game of shape `(num_games,)`
+    :param n_arms: number of possible arms
+    :param num_games: number of games
+    :param rng: random generator of the exploration
+    """
+
+    def __init__(self, epsilon: Union[float, np.ndarray], n_arms: int, num_games: int,
+                 rng: Optional[np.random.Generator] = None) -> None:
+        assert is_positive_integer(n_arms), f"{n_arms} should be a positive integer"
+        assert is_positive_integer(num_games), f"{num_games} should be a positive integer"
+        epsilon = np.broadcast_to(np.asarray(epsilon, dtype=np.float64), (num_games,))
+        assert ((0 <= epsilon) & (epsilon <= 1)).all(), f"{epsilon} should be floats between 0 and 1"
+        self.epsilon = epsilon
+        self.n_arms = n_arms
+        self.num_games = num_games
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self._games = np.arange(num_games)
+        self.reset()
+
+    def select_arms(self) -> np.ndarray:
+        """ select an arm in every game
+
+        Returns:
+            np.ndarray: chosen arms of shape `(num_games,)`
+        """
+        explore = self.rng.random(self.num_games) <= self.epsilon
+        random_arms = self.rng.integers(self.n_arms, size=self.num_games)
+        return np.where(explore, random_arms, np.argmax(self.values, axis=1))
+
+    def update(self, chosen_arms: np.ndarray, rewards: np.ndarray) -> None:
+        """ update the value estimators and counts of the played arms of all games
+
+        Args:
+            chosen_arms (np.ndarray): played arms of shape `(num_games,)`
+            rewards (np.ndarray): observed rewards of shape `(num_games,)`
+        """
+        self.counts[self._games, chosen_arms] += 1
+        counts = self.counts[self._games, chosen_arms]
+        # memory trick of `EpsilonGreedy.update` with the same rounding, so ties are broken identically
+        self.values[self._games, chosen_arms] = ((counts - 1) / counts) * self.values[self._games, chosen_arms] \
+            + (1 / counts) * rewards
+
+    def reset(self) -> None:
+        """ reset agent by resetting all required statistics
+        """
+        self.counts = np.zeros((self.num_games, self.n_arms), dtype=np.int64)
+        self.values = np.zeros((self.num_games, self.n_arms))
@@ -0,0 +1,264 @@
+from typing import Optional
+
+import numpy as np
+
+from bandits.bernoulli_bandit import VectorBernoulliBanditEnv
+from bandits.epsilon_greedy import VectorEpsilonGreedy
+from bandits.reward_tape import RewardTape
+from bandits.statistics import StreamingStatistics
+
+
+def _plot_trajectories(trajectories: dict) -> None:
+    """ plot every group of trajectories into its own subplot
+
+    Args:
+        trajectories (dict): label -> iterable of `(name, trajectory)` pairs
+    """
+    import matplotlib.pyplot as plt
+    for index, (label, trajs) in enumerate(trajectories.items(), start=1):
+        plt.subplot(len(trajectories), 1, index)
+        for name, traj in trajs:
+            plt.plot(range(len(traj)), traj, label=f"{label} {name}")
+        plt.legend()
+    plt.show()
+
+
+def train_epsilongreedy(agent, env, num_games, printed):
+    """ play `num_games` games of a `BernoulliBanditEnv` with an `EpsilonGreedy` agent
+
+    Returns:
+        tuple: rewards, chosen arms, cumulative regrets and number of optimal plays of
+            shape `(num_games, max_steps)`
+    """
+    chosen_arms = np.zeros(shape=(num_games, env.max_steps))
+    rewards = np.zeros(shape=(num_games, env.max_steps))
+    regrets = np.zeros(shape=(num_games, env.max_steps))
+    optimalities = np.zeros(shape=(num_games, env.max_steps))
+
+    for game in range(num_games):
+        # playing the algo for `num_games` rounds
+        agent.reset()
+        env.reset()
+        done = False
+        while (not done):
+            # playing the game until it is done
+            action = agent.select_arm()
+            _new_state, reward, done, _info = env.step(action)
+            rewards[game, (env.count-1)] = reward
+            chosen_arms[game, (env.count-1)] = action
+            regrets[game, (env.count-1)] = env.regret
+            optimalities[game, (env.count-1)] = env.played_optimal
+            # update all the time
+            agent.update(action, reward)
+
+    if printed:
+        _plot_trajectories({
+            label: [(f"{i}, epsilon {agent.epsilon}", traj) for i, traj in enumerate(trajs)]
+            for label, trajs in (("reward", rewards), ("action sequence", chosen_arms),
+                                 ("regrets", regrets), ("optimalities", optimalities))})
+
+    return rewards, chosen_arms, regrets, optimalities
+
+
+def train_vector_epsilongreedy(agent: VectorEpsilonGreedy, env: VectorBernoulliBanditEnv):
+    """ play all games of a `VectorBernoulliBanditEnv` at once, the vectorized `train_epsilongreedy`
+
+    Returns:
+        tuple: rewards, chosen arms, cumulative regrets and number of optimal plays of
+            shape `(num_games, max_steps)` with the meaning of `train_epsilongreedy`
+    """
+    assert agent.num_games == env.num_games, \
+        f"agent plays {agent.num_games} games but the environment has {env.num_games}"
+    chosen_arms = np.zeros(shape=(env.num_games, env.max_steps), dtype=np.int64)
+    rewards = np.zeros(shape=(env.num_games, env.max_steps))
+    regrets = np.zeros(shape=(env.num_games, env.max_steps))
+    optimalities = np.zeros(shape=(env.num_games, env.max_steps), dtype=np.int64)
+
+    agent.reset()
+    env.reset()
+    done = False
+    while not done:
+        actions = agent.select_arms()
+        _states, reward, done, _info = env.step(actions)
+        rewards[:, env.count - 1] = reward
+        chosen_arms[:, env.count - 1] = actions
+        regrets[:, env.count - 1] = env.regret
+        optimalities[:, env.count - 1] = env.played_optimal
+        agent.update(actions, reward)
+    return rewards, chosen_arms, regrets, optimalities
+
+
+def game_statistics(max_steps: int, checkpoints: Optional[np.ndarray] = None, bins: int = 32) -> dict:
+    """ empty accumulators of the statistics of `simulate_games`
+
+    Args:
+        max_steps (int): number of steps of every game
+        checkpoints (np.ndarray, optional): tracked steps, e.g. `log_checkpoints(max_steps)`.
+            Defaults to all steps.
+        bins (int, optional): number of bins of the quantile sketches. Defaults to 32.
+
+    Returns:
+        dict: `StreamingStatistics` of the `rewards`, the cumulative rewards `cum_rewards`,
+            the cumulative `regrets` and the number of `optimalities` up to every step
+    """
+    steps = np.arange(max_steps) if checkpoints is None else np.asarray(checkpoints)
+    # ranges of the quantile sketches, every statistic changes by at most one per step
+    reach = steps + 1.0
+    return {
+        "rewards": StreamingStatistics(steps, 0.0, 1.0, bins),
+        "cum_rewards": StreamingStatistics(steps, 0.0, reach, bins),
+        "regrets": StreamingStatistics(steps, -reach, reach, bins),
+        "optimalities": StreamingStatistics(steps, 0.0, reach, bins),
+    }
+
+
+def draw_games(n_arms: int, num_games: int, max_steps: int, rng: np.random.Generator):
+    """ uniformly drawn mean parameters and the reward tape of `num_games` games
+
+    Agents which are compared on the same games use common random numbers.
+
+    Returns:
+        tuple: mean parameters of shape `(num_games, n_arms)` and the `RewardTape`
+    """
+    mean_parameter = rng.uniform(low=0.0, high=1.0, size=(num_games, n_arms))
+    return mean_parameter, RewardTape(mean_parameter, max_steps, rng)
+
+
+def simulate_games(epsilon: float, n_arms: int, num_games: int, max_steps: int,
+                   rng: np.random.Generator, checkpoints: Optional[np.ndarray] = None,
+                   bins: int = 32, games: Optional[tuple] = None) -> dict:
+    """ play `num_games` games with random mean parameters and aggregate their statistics per step
+
+    The games are not stored, the statistics of every tracked step are streamed into
+    mergeable accumulators, so the memory is independent of `num_games`. Accumulators
+    of several batches of games can be combined with `StreamingStatistics.merge`.
+
+    Args:
+        epsilon (float): epsilon parameter of the agent
+        n_arms (int): number of arms
+        num_games (int): number of games
+        max_steps (int): number of steps of every game
+        rng (np.random.Generator): random generator of the mean parameters, rewards and exploration
+        checkpoints (np.ndarray, optional): tracked steps. Defaults to all steps.
+        bins (int, optional): number of bins of the quantile sketches. Defaults to 32.
+        games (tuple, optional): mean parameters and reward tape of `draw_games` which are
+            replayed. Defaults to games and rewards drawn from `rng`.
+
+    Returns:
+        dict: accumulators as returned by `game_statistics`
+    """
+    if games is None:
+        mean_parameter, tape = rng.uniform(low=0.0, high=1.0, size=(num_games, n_arms)), None
+    else:
+        mean_parameter, tape = games
+    env = VectorBernoulliBanditEnv(p_parameter=mean_parameter, max_steps=max_steps, rng=rng, tape=tape)
+    agent = VectorEpsilonGreedy(epsilon=epsilon, n_arms=n_arms, num_games=num_games, rng=rng)
+    statistics = game_statistics(max_steps, checkpoints, bins)
+    tracked = statistics["rewards"]
+    cum_rewards = np.zeros(num_games)
+    for step in range(max_steps):
+        actions = agent.select_arms()
+        _states, rewards, _done, _info = env.step(actions)
+        agent.update(actions, rewards)
+        cum_rewards += rewards
+        if tracked.tracks(step):
+            statistics["rewards"].update(step, rewards)
+            statistics["cum_rewards"].update(step, cum_rewards)
+            statistics["regrets"].update(step, env.regret)
+            statistics["optimalities"].update(step, env.played_optimal)
+    return statistics
+
+
+def summarize_games(statistics: dict) -> tuple:
+    """ mean reward, cumulative mean reward, mean regret and fraction of optimal plays per tracked step
+
+    Args:
+        statistics (dict): accumulators as returned by `simulate_games`
+
+    Returns:
+        tuple: four arrays of shape `(len(steps),)` as computed by `epsilon_greedy_exp`
+    """
+    steps = statistics["rewards"].steps
+    return (statistics["rewards"].mean, statistics["cum_rewards"].mean, statistics["regrets"].mean,
+            statistics["optimalities"].mean / (steps + 1))
+
+
+def print_statistics(epsilon: float, mean_cum_rewards: np.ndarray, mean_regrets: np.ndarray,
+                     mean_optimalities: np.ndarray) -> None:
+    """ print the final statistics of an epsilon in console
+    """
+    print(50*"*")
+    print(f"total mean reward with epsilon= {epsilon} is {mean_cum_rewards[-1]}")
+    print(f"total regret with epsilon= {epsilon} is {mean_regrets[-1]}")
+    print(f"total optimality with epsilon= {epsilon} is {mean_optimalities[-1]}")
+    print(50*"*")
+
+
+def plot_statistics(statistics_mean: dict, statistics_cumsum: dict, statistics_regrets: dict,
+                    statistics_optimalities: dict) -> None:
+    """ plot the statistics of `epsilon_greedy_exp`
+    """
+    _plot_trajectories({
+        label: [(f"epsilon {used_epsi}", traj) for used_epsi, traj in statistics.items()]
+        for label, statistics in (("mean reward,", statistics_mean), ("cumsum reward,", statistics_cumsum),
+                                  ("regrets,", statistics_regrets), ("optimalities,", statistics_optimalities))})
+
+
+def epsilon_greedy_exp(max_steps, n_arms, used_epsilons, num_games, printed, seed: Optional[int] = None,
+                       checkpoints: Optional[np.ndarray] = None, common_random_numbers: bool = False):
+    """ vectorized experiment of `02_IntroductionMultiarmed.ipynb`, which plays `num_games` games
+    with uniformly drawn mean parameters for every epsilon
+
+    The memory is O(max_steps) independent of `num_games`, with log-spaced `checkpoints`
+    only O(log max_steps).
+
+    Args:
+        max_steps (int): number of steps of every game
+        n_arms (int): number of arms
+        used_epsilons (list): epsilon parameters of the agent
+        num_games (int): number of games per epsilon
+        printed (bool): plot the statistics
+        seed (int, optional): seed of the random generator
+        checkpoints (np.ndarray, optional): tracked steps, e.g. `log_checkpoints(max_steps)`.
+            Defaults to all steps.
+        common_random_numbers (bool, optional): play all epsilons on the same games with the same
+            reward tape, which reduces the variance of their differences. Defaults to False.
+
+    Returns:
+        tuple: dicts from `str(epsilon)` to the mean rewards, the cumulative mean rewards, the
+            mean regrets and the fraction of optimal plays per tracked step
+    """
+    rng = np.random.default_rng(seed)
+    games = draw_games(n_arms, num_games, max_steps, rng) if common_random_numbers else None
+    statistics_mean = {}
+    statistics_cumsum = {}
+    statistics_regrets = {}
+    statistics_optimalities = {}
+
+    for epsilon in used_epsilons:
+        statistics = simulate_games(epsilon, n_arms, num_games, max_steps, rng, checkpoints, games=games)
+        mean_rewards, mean_cum_rewards, mean_regrets, mean_optimalities = summarize_games(statistics)
+        statistics_mean[str(epsilon)] = mean_rewards
+        statistics_cumsum[str(epsilon)] = mean_cum_rewards
+        statistics_regrets[str(epsilon)] = mean_regrets
+        statistics_optimalities[str(epsilon)] = mean_optimalities
+        print_statistics(epsilon, mean_cum_rewards, mean_regrets, mean_optimalities)
+
+    if printed:
+        plot_statistics(statistics_mean, statistics_cumsum, statistics_regrets, statistics_optimalities)
+
+    return statistics_mean, statistics_cumsum, statistics_regrets, statistics_optimalities
+
+
+if __name__ == "__main__":
+    import time
+
+    MAX_STEPS = 2000
+    N_ARMS = 10
+    USED_EPSILONS = [0.1, 0.2, 0.5]
+    NUM_GAMES = 3000
+
+    start_time = time.perf_counter()
+    epsilon_greedy_exp(max_steps=MAX_STEPS, n_arms=N_ARMS, used_epsilons=USED_EPSILONS,
+                       num_games=NUM_GAMES, printed=False, seed=42)
+    print(f"experiment finished in {time.perf_counter() - start_time:.2f}s")
@@ -0,0 +1,62 @@
+import numpy as np
+
+
+class RewardTape():
+    """ pre-drawn Bernoulli rewards of every arm at every step of many games, bit-packed
+
+    Agents which replay the same tape see the same reward whenever they play the same arm
+    at the same step (common random numbers). Differences between agents are then not
+    hidden by the noise of the rewards, so far fewer games are needed to compare them.
+    All uniforms are drawn in bulk, one bit per game, step and arm is stored.
+
+    :param p_parameter: mean parameter of the arms of all games, shape `(num_games, n_arms)`
+    :param max_steps: number of steps of every game
+    :param rng: random generator of the rewards
+    :param chunk_bytes: approximate size of the uniforms drawn at once
+    """
+
+    def __init__(self, p_parameter: np.ndarray, max_steps: int, rng: np.random.Generator,
+                 chunk_bytes: int = 2**25) -> None:
+        p_parameter = np.asarray(p_parameter, dtype=np.float64)
+        assert p_parameter.ndim == 2, \
+            f"p_parameter has to be of shape (num_games, n_arms) but is {p_parameter.shape}"
+        self.num_games, self.n_arms = p_parameter.shape
+        self.max_steps = max_steps
+        bits_per_game = max_steps * self.n_arms
+        self.bits = np.empty((self.num_games, (bits_per_game + 7) // 8), dtype=np.uint8)
+        # games are drawn in chunks, so the float uniforms never need much memory
+        games_per_chunk = max(1, chunk_bytes // (8 * bits_per_game))
+        for begin in range(0, self.num_games, games_per_chunk):
+            stop = min(begin + games_per_chunk, self.num_games)
+            uniforms = rng.random((stop - begin, max_steps, self.n_arms))
+            rewards = uniforms < p_parameter[begin:stop, None, :]
+            self.bits[begin:stop] = np.packbits(rewards.reshape(stop - begin, bits_per_game), axis=1)
+        self._games = np.arange(self.num_games)
+
+    @property
+    def nbytes(self) -> int:
+        return self.bits.nbytes
+
+    def rewards(self, step: int, actions: np.ndarray) -> np.ndarray:
+        """ rewards of the chosen arms of all games at `step`
+
+        Args:
+            step (int): step index
+            actions (np.ndarray): chosen arms of shape `(num_games,)`
+
+        Returns:
+            np.ndarray: float rewards of shape `(num_games,)`
+        """
+        index = step * self.n_arms + np.asarray(actions)
+        # `packbits` stores the first bit in the most significant position
+        bits = self.bits[self._games, index >> 3] >> (7 - (index & 7))
+        return (bits & 1).astype(np.float64)
+
+    def game(self, game: int) -> np.ndarray:
+        """ unpacked tape of one game
+
+        Returns:
+            np.ndarray: boolean rewards of shape `(max_steps, n_arms)`
+        """
+        bits = np.unpackbits(self.bits[game], count=self.max_steps * self.n_arms)
+        return bits.reshape(self.max_steps, self.n_arms).astype(bool)
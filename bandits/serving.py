@@ -0,0 +1,266 @@
+import asyncio
+import logging
+import math
+import random
+import time
+from typing import Optional, Union
+
+import numpy as np
+
+from bandits.epsilon_greedy import EpsilonGreedy, ScalableEpsilonGreedy
+from telemetry.latency import LatencyStats
+
+logger = logging.getLogger(__name__)
+
+
+class Snapshot():
+    """ immutable view of the agent which answers `select_arm`
+
+    :param best_arm: arm with the largest estimated value
+    :param version: number of applied batches
+    :param updates: number of applied updates
+    """
+
+    __slots__ = ("best_arm", "version", "updates")
+
+    def __init__(self, best_arm: int, version: int, updates: int) -> None:
+        self.best_arm = best_arm
+        self.version = version
+        self.updates = updates
+
+
+class BanditServer():
+    """ asyncio serving wrapper of an epsilon greedy agent for many concurrent clients
+
+    `select_arm` never waits for a lock, it reads the current `Snapshot`, which is replaced
+    as a whole after every batch. `update` validates the reward and only appends it to a
+    buffer. A background task applies the buffered updates in micro-batches every
+    `batch_interval` seconds or as soon as `max_batch` updates are waiting.
+
+    `ScalableEpsilonGreedy` applies a batch vectorized with `update_batch` and reads the
+    best arm from its argmax tree in O(1). Agents without them, like the notebook
+    `EpsilonGreedy`, are updated one reward at a time and the best arm is searched in
+    O(n_arms) once per batch. A failing batch is logged, counted in `metrics` and kept in
+    the buffer for the next attempt.
+
+    The server is not thread-safe, the metrics and the random generators are shared
+    without a lock. Call all methods from the thread which runs the event loop, e.g. with
+    `loop.call_soon_threadsafe` from other threads.
+
+    :param agent: epsilon greedy agent with `epsilon`, `n_arms`, `values` and `update`,
+        e.g. `ScalableEpsilonGreedy` or `EpsilonGreedy`
+    :param batch_interval: seconds between two micro-batches
+    :param max_batch: number of buffered updates which triggers a batch immediately
+    :param seed: seed of the exploration
+    """
+
+    def __init__(self, agent: Union[ScalableEpsilonGreedy, EpsilonGreedy], batch_interval: float = 0.01,
+                 max_batch: int = 4096, seed: Optional[int] = None) -> None:
+        self.agent = agent
+        self.batch_interval = batch_interval
+        self.max_batch = max_batch
+        self._random = random.Random(seed).random
+        self._randrange = random.Random(None if seed is None else seed + 1).randrange
+        self.snapshot = Snapshot(self._best_arm(), 0, 0)
+        self._arms, self._rewards, self._enqueued = [], [], []
+        self._wakeup = None
+        self._task = None
+        # metrics
+        self.select_stats = LatencyStats()
+        self.batch_stats = LatencyStats()
+        self.staleness_stats = LatencyStats()
+        self.max_queue_depth = 0
+        self.errors = 0
+        self.last_error = None
+
+    def _best_arm(self) -> int:
+        """ first arm with the largest value estimate, ties as in `EpsilonGreedy.select_arm`
+        """
+        if hasattr(self.agent, "tree"):
+            return self.agent.tree.argmax()
+        return int(np.argmax(self.agent.values))
+
+    def _apply(self, arms: list, rewards: list) -> None:
+        if hasattr(self.agent, "update_batch"):
+            self.agent.update_batch(np.asarray(arms), np.asarray(rewards, dtype=np.float64))
+        else:
+            for arm, reward in zip(arms, rewards):
+                self.agent.update(arm, reward)
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._arms)
+
+    def select_arm_nowait(self) -> int:
+        """ epsilon greedy choice on the current snapshot without awaiting
+        """
+        start = time.perf_counter()
+        if self._random() > self.agent.epsilon:
+            arm = self.snapshot.best_arm
+        else:
+            arm = self._randrange(self.agent.n_arms)
+        self.select_stats.record(time.perf_counter() - start)
+        return arm
+
+    async def select_arm(self) -> int:
+        return self.select_arm_nowait()
+
+    def update(self, chosen_arm: int, reward: float) -> None:
+        """ buffer an observed reward, it is applied with the next micro-batch
+
+        Raises:
+            ValueError: if `chosen_arm` is not an arm of the agent or `reward` is not a finite number
+        """
+        if isinstance(chosen_arm, (bool, np.bool_)) or not isinstance(chosen_arm, (int, np.integer)) \
+                or not 0 <= chosen_arm < self.agent.n_arms:
+            raise ValueError(f"chosen_arm has to be an int in [0, {self.agent.n_arms}) but is {chosen_arm!r}")
+        if not isinstance(reward, (int, float, np.integer, np.floating)) or not math.isfinite(reward):
+            raise ValueError(f"reward has to be a finite number but is {reward!r}")
+        self._arms.append(int(chosen_arm))
+        self._rewards.append(float(reward))
+        self._enqueued.append(time.perf_counter())
+        depth = len(self._arms)
+        if depth > self.max_queue_depth:
+            self.max_queue_depth = depth
+        if depth >= self.max_batch and self._wakeup is not None:
+            self._wakeup.set()
+
+    def flush(self) -> int:
+        """ apply all buffered updates as one batch and publish a new snapshot
+
+        If the agent raises, the batch is put back in front of the buffer and the error is
+        raised again.
+
+        Returns:
+            int: number of applied updates
+        """
+        if not self._arms:
+            return 0
+        # swap the buffers, updates arriving meanwhile go to the new ones
+        arms, rewards, enqueued = self._arms, self._rewards, self._enqueued
+        self._arms, self._rewards, self._enqueued = [], [], []
+        start = time.perf_counter()
+        try:
+            self._apply(arms, rewards)
+        except Exception:
+            self._arms, self._rewards, self._enqueued = (
+                arms + self._arms, rewards + self._rewards, enqueued + self._enqueued)
+            raise
+        self.snapshot = Snapshot(self._best_arm(), self.snapshot.version + 1,
+                                 self.snapshot.updates + len(arms))
+        now = time.perf_counter()
+        self.batch_stats.record(now - start)
+        self.staleness_stats.record(now - enqueued[0])
+        return len(arms)
+
+    async def _flush_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.batch_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as error:  # pylint: disable=broad-except
+                # keep serving, the batch is retried with the next flush
+                self.errors += 1
+                self.last_error = error
+                logger.exception("applying a batch of %d updates failed", self.queue_depth)
+
+    async def start(self) -> "BanditServer":
+        """ start the background task which applies the micro-batches
+        """
+        assert self._task is None, "the server is already running"
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._flush_loop())
+        return self
+
+    async def stop(self) -> None:
+        """ stop the background task and apply the remaining updates, errors of the agent are raised
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.flush()
+
+    async def __aenter__(self) -> "BanditServer":
+        return await self.start()
+
+    async def __aexit__(self, *args) -> None:
+        await self.stop()
+
+    def metrics(self) -> dict:
+        """ latency of `select_arm` and of the batches, staleness of the updates and queue depth
+        """
+        return {
+            "select": self.select_stats.to_dict(),
+            "batch": self.batch_stats.to_dict(),
+            "staleness": self.staleness_stats.to_dict(),
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "version": self.snapshot.version,
+            "applied_updates": self.snapshot.updates,
+            "errors": self.errors,
+            "last_error": None if self.last_error is None else repr(self.last_error),
+        }
+
+
+async def load_test(server: BanditServer, mean_parameter: np.ndarray, num_clients: int = 1000,
+                    requests_per_client: int = 100, reward_delay: float = 0.001, seed: Optional[int] = None) -> dict:
+    """ simulate concurrent clients which request an arm and report a Bernoulli reward later
+
+    Args:
+        server (BanditServer): running server
+        mean_parameter (np.ndarray): reward probability of every arm
+        num_clients (int, optional): number of concurrent clients. Defaults to 1000.
+        requests_per_client (int, optional): requests of every client. Defaults to 100.
+        reward_delay (float, optional): mean delay in seconds before a reward is reported. Defaults to 0.001.
+        seed (int, optional): seed of the rewards and delays
+
+    Returns:
+        dict: number of requests, throughput and exact latency quantiles of `select_arm` in seconds
+            as seen by the clients, including the scheduling of the event loop
+    """
+    rng = np.random.default_rng(seed)
+    latencies = []
+    mean_parameter = np.asarray(mean_parameter).tolist()
+
+    async def client(uniforms, delays):
+        for uniform, delay in zip(uniforms, delays):
+            start = time.perf_counter()
+            arm = await server.select_arm()
+            latencies.append(time.perf_counter() - start)
+            await asyncio.sleep(delay)
+            server.update(arm, float(uniform < mean_parameter[arm]))
+
+    start_time = time.perf_counter()
+    await asyncio.gather(*(
+        client(rng.random(requests_per_client).tolist(),
+               rng.exponential(reward_delay, size=requests_per_client).tolist())
+        for _ in range(num_clients)))
+    elapsed = time.perf_counter() - start_time
+    latencies = np.asarray(latencies)
+    return {"requests": latencies.size, "elapsed_seconds": elapsed, "requests_per_second": latencies.size / elapsed,
+            "p50_seconds": float(np.quantile(latencies, 0.5)), "p99_seconds": float(np.quantile(latencies, 0.99)),
+            "max_seconds": float(latencies.max())}
+
+
+if __name__ == "__main__":
+    N_ARMS = 100_000
+
+    async def main():
+        means = np.random.default_rng(seed=0).uniform(0.0, 0.1, size=N_ARMS)
+        async with BanditServer(ScalableEpsilonGreedy(epsilon=0.1, n_arms=N_ARMS), seed=0) as server:
+            report = await load_test(server, means, num_clients=1000, requests_per_client=50, seed=0)
+        print(report)
+        metrics = server.metrics()
+        print({key: value for key, value in metrics.items() if not isinstance(value, dict)})
+        for name in ("select", "batch", "staleness"):
+            print(name, {key: metrics[name][key] for key in ("calls", "mean_seconds", "p99_seconds")})
+
+    asyncio.run(main())
@@ -0,0 +1,142 @@
+from typing import Optional, Sequence, Union
+
+import numpy as np
+
+
+def log_checkpoints(max_steps: int, num: int = 64) -> np.ndarray:
+    """ about `num` log-spaced step indices from the first to the last step
+
+    Args:
+        max_steps (int): number of steps
+        num (int, optional): maximal number of checkpoints. Defaults to 64.
+
+    Returns:
+        np.ndarray: sorted unique step indices including `0` and `max_steps - 1`
+    """
+    steps = np.geomspace(1, max_steps, num=min(num, max_steps)).round().astype(np.int64) - 1
+    return np.unique(np.concatenate(([0], steps, [max_steps - 1])))
+
+
+class StreamingStatistics():
+    """ running statistics of a value per time step over many games, without storing the games
+
+    For every tracked step the number of observations, the mean and the sum of squared
+    deviations (Welford) are kept, batches and other accumulators are combined with the
+    parallel formula of Chan et al. Optionally a histogram over `[low, high]` per step
+    serves as quantile sketch. The memory is O(len(steps) * bins) and independent of
+    the number of games.
+
+    :param steps: tracked step indices, e.g. `np.arange(max_steps)` or `log_checkpoints(max_steps)`
+    :param low: lower end of the histogram of every tracked step, a float or an array of shape `(len(steps),)`
+    :param high: upper end of the histogram of every tracked step, values outside are clipped
+    :param bins: number of histogram bins, zero disables the quantile sketch
+    """
+
+    def __init__(self, steps: Sequence[int], low: Union[float, np.ndarray] = 0.0,
+                 high: Union[float, np.ndarray] = 1.0, bins: int = 32) -> None:
+        self.steps = np.asarray(steps, dtype=np.int64)
+        n_slots = len(self.steps)
+        self._slots = {int(step): slot for slot, step in enumerate(self.steps)}
+        self.count = np.zeros(n_slots, dtype=np.int64)
+        self.mean = np.zeros(n_slots)
+        self.m2 = np.zeros(n_slots)
+        self.bins = bins
+        self.low = np.broadcast_to(np.asarray(low, dtype=np.float64), (n_slots,)).copy()
+        self.high = np.broadcast_to(np.asarray(high, dtype=np.float64), (n_slots,)).copy()
+        assert np.all(self.high > self.low), "high has to be larger than low for every step"
+        self.histogram = np.zeros((n_slots, bins), dtype=np.int64)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in (self.steps, self.count, self.mean, self.m2,
+                                              self.low, self.high, self.histogram))
+
+    def tracks(self, step: int) -> bool:
+        return step in self._slots
+
+    def update(self, step: int, values: np.ndarray) -> None:
+        """ add the values of all games at `step`, untracked steps are ignored
+
+        Args:
+            step (int): step index
+            values (np.ndarray): one value per game of shape `(n,)`
+        """
+        slot = self._slots.get(step)
+        if slot is None:
+            return
+        values = np.asarray(values, dtype=np.float64)
+        batch_count = values.size
+        if batch_count == 0:
+            return
+        batch_mean = values.mean()
+        batch_m2 = np.square(values - batch_mean).sum()
+        self._combine(slot, batch_count, batch_mean, batch_m2)
+        if self.bins:
+            scaled = (values - self.low[slot]) * (self.bins / (self.high[slot] - self.low[slot]))
+            indices = np.clip(scaled.astype(np.int64), 0, self.bins - 1)
+            self.histogram[slot] += np.bincount(indices, minlength=self.bins)
+
+    def _combine(self, slot, count, mean, m2) -> None:
+        """ parallel combination of the moments of `slot` with the moments of another set of values
+        """
+        total = self.count[slot] + count
+        delta = mean - self.mean[slot]
+        self.mean[slot] += delta * count / total
+        self.m2[slot] += m2 + delta ** 2 * self.count[slot] * count / total
+        self.count[slot] = total
+
+    def merge(self, other: "StreamingStatistics") -> "StreamingStatistics":
+        """ add the statistics of another accumulator with the same steps and histogram ranges,
+        e.g. of another worker
+
+        Returns:
+            StreamingStatistics: this accumulator
+        """
+        assert np.array_equal(self.steps, other.steps), "accumulators track different steps"
+        assert self.bins == other.bins and np.array_equal(self.low, other.low) \
+            and np.array_equal(self.high, other.high), "accumulators have different histograms"
+        total = self.count + other.count
+        safe_total = np.maximum(total, 1)
+        delta = other.mean - self.mean
+        self.mean = self.mean + delta * other.count / safe_total
+        self.m2 = self.m2 + other.m2 + delta ** 2 * self.count * other.count / safe_total
+        self.count = total
+        self.histogram = self.histogram + other.histogram
+        return self
+
+    def variance(self, ddof: int = 0) -> np.ndarray:
+        """ variance of the values of every tracked step
+        """
+        return self.m2 / np.maximum(self.count - ddof, 1)
+
+    def std(self, ddof: int = 0) -> np.ndarray:
+        return np.sqrt(self.variance(ddof))
+
+    def quantile(self, q: float) -> np.ndarray:
+        """ quantile of every tracked step, linearly interpolated within the histogram bins
+
+        Args:
+            q (float): probability in `[0, 1]`
+
+        Returns:
+            np.ndarray: approximate quantiles of shape `(len(steps),)`, exact up to the bin width
+        """
+        assert self.bins, "the quantile sketch is disabled"
+        cumulative = np.cumsum(self.histogram, axis=1)
+        target = q * cumulative[:, -1]
+        bin_index = np.minimum((cumulative < target[:, None]).sum(axis=1), self.bins - 1)
+        rows = np.arange(len(self.steps))
+        below = np.where(bin_index > 0, cumulative[rows, bin_index - 1], 0)
+        in_bin = np.maximum(self.histogram[rows, bin_index], 1)
+        fraction = np.clip((target - below) / in_bin, 0.0, 1.0)
+        width = (self.high - self.low) / self.bins
+        return self.low + (bin_index + fraction) * width
+
+    def to_dict(self, quantiles: Optional[Sequence[float]] = (0.05, 0.5, 0.95)) -> dict:
+        """ statistics of all tracked steps as plain lists
+        """
+        result = {"steps": self.steps.tolist(), "count": self.count.tolist(), "mean": self.mean.tolist(),
+                  "std": self.std().tolist()}
+        if self.bins and quantiles:
+            result["quantiles"] = {str(q): self.quantile(q).tolist() for q in quantiles}
+        return result
@@ -0,0 +1,138 @@
+import multiprocessing as mp
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Sequence
+
+import numpy as np
+
+from bandits.experiments import (draw_games, game_statistics, plot_statistics, print_statistics,
+                                 simulate_games, summarize_games)
+
+
+class SweepResult():
+    """ result of `run_sweep`, dicts from `str(epsilon)` to arrays with one entry per tracked step
+
+    :param statistics_mean: mean reward per step
+    :param statistics_cumsum: cumulative mean reward per step
+    :param statistics_regrets: mean cumulative regret per step
+    :param statistics_optimalities: fraction of plays of the optimal arm up to every step
+    :param entropy: entropy of the root `SeedSequence`, reproduces the sweep as `seed`
+    :param num_units: number of (epsilon, game chunk) work units
+    :param elapsed: wall clock time in seconds
+    """
+
+    def __init__(self, statistics_mean, statistics_cumsum, statistics_regrets, statistics_optimalities,
+                 entropy, num_units, elapsed) -> None:
+        self.statistics_mean = statistics_mean
+        self.statistics_cumsum = statistics_cumsum
+        self.statistics_regrets = statistics_regrets
+        self.statistics_optimalities = statistics_optimalities
+        self.entropy = entropy
+        self.num_units = num_units
+        self.elapsed = elapsed
+
+    def as_tuple(self) -> tuple:
+        """ statistics in the order returned by `epsilon_greedy_exp`
+        """
+        return self.statistics_mean, self.statistics_cumsum, self.statistics_regrets, self.statistics_optimalities
+
+    def __repr__(self) -> str:
+        return f"SweepResult(epsilons={list(self.statistics_mean)}, units={self.num_units}, elapsed={self.elapsed:.4f}s)"
+
+
+def unit_generator(entropy: int, epsilon_index: int, chunk_index: int) -> np.random.Generator:
+    """ independent random generator of a work unit
+
+    The stream only depends on the root entropy and the position of the unit in the sweep,
+    not on the worker which runs it.
+    """
+    return np.random.default_rng(np.random.SeedSequence(entropy, spawn_key=(epsilon_index, chunk_index)))
+
+
+def _run_unit(unit: tuple) -> dict:
+    entropy, epsilon_index, chunk_index, epsilon, n_arms, num_games, max_steps, checkpoints, common = unit
+    rng = unit_generator(entropy, epsilon_index, chunk_index)
+    games = None
+    if common:
+        # the games of a chunk only depend on the chunk, so every epsilon replays them
+        games_rng = np.random.default_rng(np.random.SeedSequence(entropy, spawn_key=(chunk_index,)))
+        games = draw_games(n_arms, num_games, max_steps, games_rng)
+    return simulate_games(epsilon, n_arms, num_games, max_steps, rng, checkpoints, games=games)
+
+
+def run_sweep(max_steps: int, n_arms: int, used_epsilons: Sequence[float], num_games: int,
+              seed: Optional[int] = None, chunk_size: int = 250, num_workers: Optional[int] = None,
+              context: Optional[str] = None, printed: bool = False,
+              checkpoints: Optional[np.ndarray] = None, common_random_numbers: bool = False) -> SweepResult:
+    """ `epsilon_greedy_exp` over a process pool
+
+    The games of every epsilon are split into chunks of `chunk_size` games. Every (epsilon,
+    chunk) work unit draws from its own generator spawned from one root `SeedSequence`, the
+    streaming statistics of the units are merged in the order of the units. Hence the result only depends on
+    `seed` and `chunk_size` and is identical for every number of workers.
+
+    Args:
+        max_steps (int): number of steps of every game
+        n_arms (int): number of arms
+        used_epsilons (Sequence[float]): epsilon parameters of the agent
+        num_games (int): number of games per epsilon
+        seed (int, optional): entropy of the root `SeedSequence`, drawn from the os if None
+        chunk_size (int, optional): number of games per work unit. Defaults to 250.
+        num_workers (int, optional): number of processes, defaults to the number of cpus.
+            With one worker all units run in this process.
+        context (str, optional): multiprocessing start method, defaults to the platform default
+        printed (bool, optional): print and plot the statistics. Defaults to False.
+        checkpoints (np.ndarray, optional): tracked steps, e.g. `log_checkpoints(max_steps)`.
+            Defaults to all steps.
+        common_random_numbers (bool, optional): play all epsilons on the same games with the same
+            reward tapes. Defaults to False.
+
+    Returns:
+        SweepResult: statistics of every epsilon and the entropy of the root seed
+    """
+    assert chunk_size > 0, f"chunk_size has to be positive but is {chunk_size}"
+    start = time.perf_counter()
+    entropy = np.random.SeedSequence(seed).entropy
+    bounds = list(range(0, num_games, chunk_size)) + [num_games]
+    units = [(entropy, epsilon_index, chunk_index, epsilon, n_arms, stop - begin, max_steps, checkpoints,
+              common_random_numbers)
+             for epsilon_index, epsilon in enumerate(used_epsilons)
+             for chunk_index, (begin, stop) in enumerate(zip(bounds[:-1], bounds[1:]))]
+
+    num_workers = min(num_workers or mp.cpu_count(), len(units))
+    if num_workers <= 1:
+        unit_statistics = [_run_unit(unit) for unit in units]
+    else:
+        with ProcessPoolExecutor(num_workers, mp_context=mp.get_context(context)) as executor:
+            # `map` returns the results in the order of the units
+            unit_statistics = list(executor.map(_run_unit, units))
+
+    statistics = ({}, {}, {}, {})
+    for epsilon_index, epsilon in enumerate(used_epsilons):
+        merged = game_statistics(max_steps, checkpoints)
+        for (_entropy, unit_epsilon, *_rest), unit_statistic in zip(units, unit_statistics):
+            if unit_epsilon == epsilon_index:
+                for name, accumulator in merged.items():
+                    accumulator.merge(unit_statistic[name])
+        for statistic, values in zip(statistics, summarize_games(merged)):
+            statistic[str(epsilon)] = values
+        if printed:
+            print_statistics(epsilon, statistics[1][str(epsilon)], statistics[2][str(epsilon)],
+                             statistics[3][str(epsilon)])
+    if printed:
+        plot_statistics(*statistics)
+    return SweepResult(*statistics, entropy=entropy, num_units=len(units), elapsed=time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    MAX_STEPS = 2000
+    N_ARMS = 10
+    USED_EPSILONS = [0.1, 0.2, 0.5]
+    NUM_GAMES = 3000
+
+    results = [run_sweep(MAX_STEPS, N_ARMS, USED_EPSILONS, NUM_GAMES, seed=42, num_workers=workers)
+               for workers in (1, None)]
+    for result in results:
+        print(result)
+    print("identical results:", all(np.array_equal(results[0].statistics_regrets[key], results[1].statistics_regrets[key])
+                                    for key in results[0].statistics_regrets))
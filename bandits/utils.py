@@ -0,0 +1,41 @@
+def is_positive_integer(value):
+    """ check if value is a positive integer
+
+    Args:
+        value (int): variable to check
+
+    Returns:
+        bool: return true if variable is a positive integer, otherwise false
+    """
+    if isinstance(value, int) and value > 0:
+        return True
+    return False
+
+
+def is_positive_float(value):
+    """ check if value is a postive float
+
+    Args:
+        value (float): variable to check
+
+    Returns:
+        bool: return true if variable is a positive float, otherwise false
+    """
+    if isinstance(value, float) and value > 0:
+        return True
+    return False
+
+
+def is_float_between_0_and_1(value):
+    """ check if value is a float between zero and one
+
+    Args:
+        value (float): variable to check
+
+    Returns:
+        bool: return true if variable is a float between zero and one, otherwise false
+    """
+    if isinstance(value, float):
+        if value >= 0 and value <= 1:
+            return True
+    return False
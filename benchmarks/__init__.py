@@ -0,0 +1,2 @@
+""" repeatable benchmarks of the hot paths of this repository, run with `python -m benchmarks`
+"""
@@ -0,0 +1,50 @@
+""" command line runner of the benchmarks
+
+Examples:
+    python -m benchmarks --output results.json
+    python -m benchmarks --baseline baseline.json --threshold 0.2
+    python -m benchmarks --filter gridworld --save-baseline baseline.json
+"""
+import argparse
+import os
+import sys
+
+from benchmarks.bench_import import check_import_budget
+from benchmarks.runner import compare_to_baseline, load_report, run_benchmarks, save_report
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__.splitlines()[0])
+    parser.add_argument("--filter", default=None, help="only run benchmarks whose name contains this string")
+    parser.add_argument("--output", default=None, help="write the results as json to this file")
+    parser.add_argument("--baseline", default=None, help="json report to compare the results with")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="relative slowdown compared to the baseline which counts as regression")
+    parser.add_argument("--save-baseline", default=None, help="write the results as new baseline to this file")
+    parser.add_argument("--min-time", type=float, default=0.2, help="minimal measurement time per benchmark")
+    parser.add_argument("--repeat", type=int, default=5, help="number of measurements per benchmark")
+    args = parser.parse_args(argv)
+
+    # never open windows while benchmarking
+    os.environ.setdefault("MPLBACKEND", "Agg")
+    results = run_benchmarks(pattern=args.filter, min_time=args.min_time, repeat=args.repeat)
+
+    exit_code = 0
+    if args.filter is None or args.filter in "import.firstmdp":
+        for violation in check_import_budget():
+            print(f"IMPORT BUDGET {violation}")
+            exit_code = 1
+    if args.baseline is not None:
+        regressions = compare_to_baseline(results, load_report(args.baseline), args.threshold)
+        for name in regressions:
+            print(f"REGRESSION {name}: {results[name]['baseline_ratio']:.2f}x slower than the baseline")
+        exit_code = 1 if regressions else exit_code
+    if args.output is not None:
+        save_report(args.output, results)
+    if args.save_baseline is not None:
+        save_report(args.save_baseline, results)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,30 @@
+""" benchmarks of `DetAgent`
+"""
+import numpy as np
+
+from benchmarks.runner import benchmark
+from firstmdp.Gridsearch import GridWorld
+from firstmdp.gridsearch_agent import DetAgent
+
+
+def setup_get_action(masking, size, num_states):
+    env = GridWorld(size)
+    agent = DetAgent(env=env, masking=masking, seed=0)
+    states = list(np.random.default_rng(seed=0).integers(size, size=(num_states, 2)))
+
+    def sample():
+        for state in states:
+            agent.get_action(state)
+    return sample, num_states
+
+
+@benchmark("agent.get_actions", size=10, num_states=10_000)
+def setup_get_actions(size, num_states):
+    agent = DetAgent(env=GridWorld(size), seed=0)
+    states = np.random.default_rng(seed=0).integers(size, size=(num_states, 2))
+    return lambda: agent.get_actions(states), num_states
+
+
+for use_masking in (True, False):
+    benchmark(f"agent.get_action[masking={use_masking}]",
+              masking=use_masking, size=10, num_states=1_000)(setup_get_action)
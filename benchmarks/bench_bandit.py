@@ -0,0 +1,84 @@
+""" benchmarks of the epsilon greedy bandit loop of `02_IntroductionMultiarmed.ipynb`
+"""
+import ast
+import contextlib
+import io
+import json
+import os
+
+import numpy as np
+
+from bandits.epsilon_greedy import ScalableEpsilonGreedy
+from bandits.experiments import simulate_games
+from benchmarks.runner import REPO_ROOT, benchmark
+
+NOTEBOOK_PATH = os.path.join(REPO_ROOT, "02_IntroductionMultiarmed.ipynb")
+
+
+def load_notebook_definitions(path: str = NOTEBOOK_PATH) -> dict:
+    """ execute only the imports, functions and classes of all code cells of a notebook
+
+    Returns:
+        dict: namespace with all definitions of the notebook
+    """
+    with open(path, "r") as file:
+        notebook = json.load(file)
+    namespace = {}
+    definitions = (ast.Import, ast.ImportFrom, ast.FunctionDef, ast.ClassDef)
+    for cell in notebook["cells"]:
+        if cell["cell_type"] != "code":
+            continue
+        tree = ast.parse("".join(cell["source"]))
+        tree.body = [node for node in tree.body if isinstance(node, definitions)]
+        exec(compile(tree, path, "exec"), namespace)  # pylint: disable=exec-used
+    return namespace
+
+
+@benchmark("bandit.train_epsilongreedy", n_arms=10, max_steps=1_000)
+def setup_train(n_arms, max_steps):
+    notebook = load_notebook_definitions()
+    agent = notebook["EpsilonGreedy"](epsilon=0.1, n_arms=n_arms)
+    mean_parameter = np.random.default_rng(seed=0).uniform(0.01, 0.99, size=n_arms).tolist()
+    env = notebook["BernoulliBanditEnv"](p_parameter=mean_parameter, max_steps=max_steps)
+    return lambda: notebook["train_epsilongreedy"](agent=agent, env=env, num_games=1, printed=False), max_steps
+
+
+@benchmark("bandit.epsilon_greedy_exp", n_arms=10, max_steps=200, num_games=20)
+def setup_experiment(n_arms, max_steps, num_games):
+    notebook = load_notebook_definitions()
+
+    def run():
+        # the experiment prints its statistics
+        with contextlib.redirect_stdout(io.StringIO()):
+            notebook["epsilon_greedy_exp"](max_steps=max_steps, n_arms=n_arms, used_epsilons=[0.1],
+                                           num_games=num_games, printed=False)
+    return run, max_steps * num_games
+
+
+@benchmark("bandit.vector_epsilon_greedy_exp", n_arms=10, max_steps=200, num_games=20)
+def setup_vector_experiment(n_arms, max_steps, num_games):
+    rng = np.random.default_rng(seed=0)
+    return lambda: simulate_games(0.1, n_arms, num_games, max_steps, rng), max_steps * num_games
+
+
+def _play_many_arms(agent, num_steps):
+    rewards = np.random.default_rng(seed=0).random(num_steps).tolist()
+
+    def play():
+        for reward in rewards:
+            agent.update(agent.select_arm(), reward)
+    return play, num_steps
+
+
+def setup_scalable_agent(n_arms, num_steps):
+    return _play_many_arms(ScalableEpsilonGreedy(epsilon=0.1, n_arms=n_arms), num_steps)
+
+
+def setup_notebook_agent(n_arms, num_steps):
+    return _play_many_arms(load_notebook_definitions()["EpsilonGreedy"](epsilon=0.1, n_arms=n_arms), num_steps)
+
+
+for arm_count in (1_000, 100_000):
+    benchmark(f"bandit.scalable_epsilon_greedy[n_arms={arm_count}]", n_arms=arm_count, num_steps=1_000)(
+        setup_scalable_agent)
+    benchmark(f"bandit.epsilon_greedy[n_arms={arm_count}]", n_arms=arm_count, num_steps=100)(setup_notebook_agent)
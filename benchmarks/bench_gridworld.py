@@ -0,0 +1,58 @@
+""" benchmarks of `GridWorld` and `VectorGridWorld`
+"""
+import numpy as np
+
+from benchmarks.runner import benchmark
+from firstmdp.Gridsearch import GridWorld
+from firstmdp.vector_env import VectorGridWorld
+
+
+def setup_init(size):
+    return lambda: GridWorld(size), 1
+
+
+def setup_model(size):
+    def build_model():
+        GridWorld(size).transition_model
+    return build_model, 1
+
+
+@benchmark("gridworld.step", size=10, num_steps=1_000)
+def setup_step(size, num_steps):
+    env = GridWorld(size)
+    actions = np.random.default_rng(seed=0).integers(4, size=num_steps).tolist()
+
+    def play():
+        env.reset()
+        for action in actions:
+            _state, _reward, done, _info = env.step(action)
+            if done:
+                env.reset()
+    return play, num_steps
+
+
+@benchmark("gridworld.step_index", size=10, num_steps=1_000)
+def setup_step_index(size, num_steps):
+    env = GridWorld(size)
+    actions = np.random.default_rng(seed=0).integers(4, size=num_steps).tolist()
+
+    def play():
+        state = 0
+        for action in actions:
+            state, _reward, done = env.step_index(state, action)
+            if done:
+                state = 0
+    return play, num_steps
+
+
+@benchmark("vector_gridworld.step", num_envs=10_000, size=10)
+def setup_vector_step(num_envs, size):
+    envs = VectorGridWorld(num_envs=num_envs, size=size)
+    actions = np.random.default_rng(seed=0).integers(4, size=num_envs)
+    return lambda: envs.step(actions), num_envs
+
+
+for grid_size in (5, 20, 100):
+    benchmark(f"gridworld.init[size={grid_size}]", size=grid_size)(setup_init)
+for grid_size in (5, 100, 1000):
+    benchmark(f"gridworld.transition_model[size={grid_size}]", size=grid_size)(setup_model)
@@ -0,0 +1,88 @@
+""" benchmarks of the distribution catalog of `gumbel_exp`
+"""
+import json
+
+import numpy as np
+import scipy.stats as stats
+
+from benchmarks.runner import benchmark
+from gumbel_exp.gumbel_exp_utils import (BOUNDS_PATH, BoltzmannGumbelRandomVariable, NoiseBuffer, build_catalog,
+                                         create_distributions, load_catalog)
+
+# sampling these distributions takes seconds to minutes per construction
+SLOW_DISTRIBUTIONS = {"gausshyper", "studentized_range"}
+
+
+class _NoiseOnly(BoltzmannGumbelRandomVariable):
+    """ concrete subclass which only draws the perturbations
+    """
+
+    def select_arm(self, *args, **kwargs):
+        pass
+
+    def update(self, *args, **kwargs):
+        pass
+
+    def reset(self):
+        pass
+
+
+def _catalog_with_fixed_parameters() -> list:
+    """ all distributions of `bounds.json` available in scipy with parameters inside their bounds
+    """
+    with open(BOUNDS_PATH, "r") as file:
+        bounds = json.load(file)
+    catalog = []
+    for name, parameters in bounds.items():
+        if name in SLOW_DISTRIBUTIONS or not isinstance(getattr(stats, name, None), stats.rv_continuous):
+            continue
+        # the lower bound plus one is valid for all finite and infinite bounds
+        values = {param: min(float(bound["lower_bound"]) + 1.0, float(bound["upper_bound"]))
+                  if float(bound["lower_bound"]) != float("-inf") else 1.0
+                  for param, bound in parameters.items()}
+        catalog.append({"name": name, "parameter": {"loc": 0.0, "scale": 1.0, **values}})
+    return catalog
+
+
+@benchmark("gumbel.build_catalog")
+def setup_build_catalog():
+    return build_catalog, 1
+
+
+@benchmark("gumbel.create_distributions", num_rep=100)
+def setup_create_distributions(num_rep):
+    # the catalog is loaded once per process, only the sampling is measured
+    load_catalog()
+    rng = np.random.default_rng(seed=0)
+    num_configurations = len(create_distributions(num_rep=1, rng=rng))
+
+    def create():
+        create_distributions(num_rep=num_rep, rng=rng)
+    return create, num_rep * num_configurations
+
+
+@benchmark("gumbel.boltzmann_construction", n_arms=10, max_steps=1_000)
+def setup_boltzmann(n_arms, max_steps):
+    catalog = _catalog_with_fixed_parameters()
+
+    def construct():
+        for randomvariable_dict in catalog:
+            try:
+                # the perturbations are drawn lazily, the first row draws the first block
+                _NoiseOnly(n_arms, 1.0, max_steps, randomvariable_dict).random_variable[0]
+            except Exception:  # pylint: disable=broad-except
+                # some parameters are outside of the support of the distribution
+                pass
+    return construct, len(catalog)
+
+
+@benchmark("gumbel.noise_buffer", n_arms=1000, block_steps=1024)
+def setup_noise_buffer(n_arms, block_steps):
+    noise = NoiseBuffer(stats.gumbel_r(), n_arms, 10**9, block_steps=block_steps, dtype=np.float32,
+                        seed=0, prefetch=True)
+    steps = iter(range(10**9))
+
+    def read():
+        for _ in range(block_steps):
+            noise[next(steps)]
+    return read, block_steps
@@ -0,0 +1,80 @@
+""" import time of the `firstmdp` package
+
+Rollout workers import the package on startup, hence importing it must neither build
+an environment nor load gym or matplotlib. `check_import_budget` enforces this and is
+run by `python -m benchmarks`.
+"""
+import json
+import subprocess
+import sys
+from typing import List
+
+from benchmarks.runner import REPO_ROOT, benchmark
+
+# seconds which importing all light modules may take on top of numpy
+IMPORT_BUDGET_SECONDS = 0.05
+
+# modules which only depend on numpy and must import fast
+LIGHT_MODULES = (
+    "firstmdp",
+    "firstmdp.transition_model",
+    "firstmdp.model_cache",
+    "firstmdp.policies",
+    "firstmdp.gridsearch_agent",
+    "firstmdp.planning",
+    "firstmdp.trainer",
+    "firstmdp.trajectory_buffer",
+    "firstmdp.frame_recorder",
+    "firstmdp.instrumentation",
+    "firstmdp.vector_env",
+)
+
+# modules which must only be imported on demand
+HEAVY_MODULES = ("gym", "matplotlib", "scipy")
+
+_IMPORT_SCRIPT = """
+import importlib, json, sys, time
+import numpy
+start = time.perf_counter()
+for module in {modules!r}:
+    importlib.import_module(module)
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure_import(modules=LIGHT_MODULES) -> dict:
+    """ import `modules` in a fresh interpreter
+
+    Returns:
+        dict: import time in `seconds` without numpy and the loaded `heavy` modules
+    """
+    script = _IMPORT_SCRIPT.format(modules=tuple(modules), heavy=HEAVY_MODULES)
+    output = subprocess.run([sys.executable, "-c", script], cwd=REPO_ROOT, check=True,
+                            capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def check_import_budget(budget: float = IMPORT_BUDGET_SECONDS, repeat: int = 3) -> List[str]:
+    """ violations of the import budget, empty if importing `firstmdp` is fast and side-effect free
+
+    Args:
+        budget (float, optional): allowed import time in seconds. Defaults to IMPORT_BUDGET_SECONDS.
+        repeat (int, optional): the fastest of `repeat` fresh imports is compared. Defaults to 3.
+    """
+    measurements = [measure_import() for _ in range(repeat)]
+    violations = []
+    heavy = sorted({module for measurement in measurements for module in measurement["heavy"]})
+    if heavy:
+        violations.append(f"importing firstmdp loads {', '.join(heavy)}")
+    seconds = min(measurement["seconds"] for measurement in measurements)
+    if seconds > budget:
+        violations.append(f"importing firstmdp takes {seconds * 1e3:.1f} ms, "
+                          f"the budget is {budget * 1e3:.1f} ms")
+    return violations
+
+
+@benchmark("import.firstmdp")
+def setup_import():
+    script = f"import importlib; [importlib.import_module(m) for m in {LIGHT_MODULES!r}]"
+    return lambda: subprocess.run([sys.executable, "-c", script], cwd=REPO_ROOT, check=True), 1
@@ -0,0 +1,187 @@
+""" registry, timing and reporting of the benchmarks
+"""
+import datetime
+import importlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Tuple
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# modules which register benchmarks on import
+BENCHMARK_MODULES = [
+    "benchmarks.bench_gridworld",
+    "benchmarks.bench_agent",
+    "benchmarks.bench_bandit",
+    "benchmarks.bench_gumbel",
+    "benchmarks.bench_import",
+]
+
+# name -> (setup function, parameters)
+REGISTRY: Dict[str, Tuple[Callable, dict]] = {}
+
+
+def benchmark(name: str, **params) -> Callable:
+    """ register a benchmark
+
+    The decorated setup function is called with `params` and returns a pair of a
+    zero-argument callable, which is timed, and the number of operations (e.g. steps)
+    performed by one call of it.
+
+    Args:
+        name (str): unique name of the benchmark, e.g. `gridworld.step`
+    """
+    def decorator(setup: Callable) -> Callable:
+        assert name not in REGISTRY, f"benchmark {name} is registered twice"
+        REGISTRY[name] = (setup, params)
+        return setup
+    return decorator
+
+
+def load_benchmarks() -> Dict[str, Tuple[Callable, dict]]:
+    """ import all benchmark modules and return the registry
+    """
+    for module in BENCHMARK_MODULES:
+        importlib.import_module(module)
+    return REGISTRY
+
+
+def time_callable(func: Callable, min_time: float = 0.2, repeat: int = 5) -> float:
+    """ best wall clock time of one call of `func` in seconds
+
+    The number of calls per measurement is increased until a measurement takes at
+    least `min_time / repeat` seconds, the minimum over `repeat` measurements is used.
+    """
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time / repeat:
+            break
+        number *= 2 if elapsed == 0 else max(2, int(min_time / repeat / elapsed))
+    timings = [elapsed]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append(time.perf_counter() - start)
+    return min(timings) / number
+
+
+def peak_memory(func: Callable) -> int:
+    """ peak memory in bytes allocated by one call of `func`, measured with tracemalloc
+    """
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        func()
+        _current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def run_benchmarks(pattern: Optional[str] = None, min_time: float = 0.2, repeat: int = 5) -> Dict[str, dict]:
+    """ run all registered benchmarks whose name contains `pattern`
+
+    Returns:
+        dict: benchmark name -> result with `seconds`, `ops_per_second` and `peak_memory_bytes`
+    """
+    results = {}
+    for name, (setup, params) in load_benchmarks().items():
+        if pattern is not None and pattern not in name:
+            continue
+        try:
+            start = time.perf_counter()
+            func, operations = setup(**params)
+            setup_seconds = time.perf_counter() - start
+            seconds = time_callable(func, min_time=min_time, repeat=repeat)
+            results[name] = {
+                "params": params,
+                "seconds": seconds,
+                "operations": operations,
+                "ops_per_second": operations / seconds if seconds > 0 else float("inf"),
+                "setup_seconds": setup_seconds,
+                "peak_memory_bytes": peak_memory(func),
+            }
+        except Exception as error:  # pylint: disable=broad-except
+            results[name] = {"params": params, "error": f"{type(error).__name__}: {error}"}
+        print(format_result(name, results[name]), flush=True)
+    return results
+
+
+def machine_metadata() -> dict:
+    """ information about the machine and the software versions used for a run
+    """
+    versions = {}
+    for package in ["numpy", "scipy", "gym", "matplotlib"]:
+        try:
+            versions[package] = importlib.import_module(package).__version__
+        except ImportError:
+            versions[package] = None
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    try:
+        import resource
+        max_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    except ImportError:
+        max_rss_kb = None
+    return {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "python": sys.version.split()[0],
+        "packages": versions,
+        "git_commit": commit,
+        "max_rss_kb": max_rss_kb,
+    }
+
+
+def compare_to_baseline(results: Dict[str, dict], baseline: Dict[str, dict], threshold: float) -> List[str]:
+    """ names of all benchmarks which are more than `threshold` slower than in the baseline
+    """
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference is None or "seconds" not in reference or "seconds" not in result:
+            continue
+        ratio = result["seconds"] / reference["seconds"]
+        result["baseline_ratio"] = ratio
+        if ratio > 1.0 + threshold:
+            regressions.append(name)
+    return regressions
+
+
+def format_result(name: str, result: dict) -> str:
+    """ one line summary of a benchmark result
+    """
+    if "error" in result:
+        return f"{name:<45} ERROR {result['error']}"
+    return (f"{name:<45} {result['seconds'] * 1e6:>14.2f} us/call {result['ops_per_second']:>16,.0f} ops/s "
+            f"{result['peak_memory_bytes'] / 1e6:>10.2f} MB peak")
+
+
+def save_report(path: str, results: Dict[str, dict]) -> None:
+    """ write the results together with the machine metadata as json
+    """
+    with open(path, "w") as file:
+        json.dump({"metadata": machine_metadata(), "results": results}, file, indent=2)
+
+
+def load_report(path: str) -> Dict[str, dict]:
+    """ load the results of a json report written by `save_report`
+    """
+    with open(path, "r") as file:
+        return json.load(file)["results"]
@@ -1,12 +1,32 @@
+import random
+
 from gym import spaces, Env
 import numpy as np
-import matplotlib.pyplot as plt 
+
+from firstmdp.alias import AliasTable
+from firstmdp.model_cache import MODEL_VERSION, ModelCache
+from firstmdp.transition_model import TransitionModel, direction_probabilities
+
+# colors of empty cells, agent, target and bomb in `rgb_array` mode
+RENDER_COLORS = np.array([[0, 0, 0], [50, 205, 50], [255, 215, 0], [220, 20, 60]], dtype=np.uint8)
+RENDER_GRID_COLOR = np.array([0, 0, 255], dtype=np.uint8)
+RENDER_SYMBOLS = np.array([".", "A", "T", "B"])
 
 class GridWorld(Env):
-    def __init__(self, size):
+    metadata = {"render.modes": ["human", "rgb_array", "ansi"]}
+    # methods timed by `firstmdp.instrumentation.instrument`, `step_index` is the transition inside `step`
+    instrumented_methods = ("step", "step_index", "reset", "render")
+
+    def __init__(self, size, model_cache: ModelCache = None, slip: float = 0.0, wind=None, seed=None):
         assert isinstance(size,int), f"size has to be an int but is {type(size)}"
         assert size > 2, f"size has to be greater than 2 but is {size}"
         self.size = size
+        # stochastic dynamics, see `direction_probabilities`
+        self.slip = float(slip)
+        self.wind = None if wind is None else [float(prob) for prob in wind]
+        self.direction_probs = direction_probabilities(self.slip, self.wind)
+        self.stochastic = bool(self.slip > 0 or (self.wind is not None and sum(self.wind) > 0))
+        self.seed(seed)
         self.observation_space = spaces.MultiDiscrete([size, size])
         self.action_space = spaces.Discrete(4)
         self.action_to_direction = {
@@ -20,36 +40,108 @@ class GridWorld(Env):
         self.state = None
         self.valid_action_space = None
 
-        # needed for build_transition_prob
-        self.all_states = np.prod(self.observation_space.nvec)
-        self.lookup_dict = {count: state for count, state in zip(
-            range(self.all_states), np.ndindex(np.zeros(self.observation_space.nvec).shape))}
-        self.lookup_dict_rev = {y: x for x, y in self.lookup_dict.items()}
-        self.transition_probs = np.zeros(
-            (self.action_space.n, self.all_states, self.all_states))
-        self._build_transition_probabilities()
+        # the transition model is only built on first access
+        self.all_states = int(np.prod(self.observation_space.nvec))
+        # the compiled tables are shared between processes through the optional on-disk cache
+        self.model_cache = model_cache
+        self._transition_model = None
+        self._reward_table = None
+        self._model_config = None
+        self._valid_action_mask = None
+        # flat tables of the integer fast path `step_index`, built on first use
+        self._step_tables = None
+        self._step_config = None
+
+        # rendering, the figure of the `human` mode is reused between calls
+        self.render_cell_size = 16
+        self._figure = None
+        self._figure_artists = None
         
         # reset environment
         self.reset()
 
+    def seed(self, seed=None):
+        """ seed the random generators of the stochastic transitions
+
+        `rng` is used for batched sampling, the scalar `step` draws from a python generator
+        which is faster for single numbers. Both are derived from `seed`.
+        """
+        rng_seed, step_seed = np.random.SeedSequence(seed).spawn(2)
+        self.rng = np.random.default_rng(rng_seed)
+        self._uniform = random.Random(int(step_seed.generate_state(1)[0])).random
+
+    @property
+    def state_index(self):
+        """ flat index of the position `state` of shape `(2,)`
+        """
+        return int(self.state[0]) * self.size + int(self.state[1])
+
     def step(self, action):
-        valid_action_space = self.get_valid_actions(self.state)
-        done = False
-        if action not in valid_action_space:
-            return self.state, 0, done, {} 
-        
-        self.state = self.state + self.action_to_direction[action]
-        if np.array_equal(self.state, self.goal_position):
-            done = True
-            reward = 10
-        elif np.array_equal(self.state, self.bomb_position):
-            done = True
-            reward = -10
-        else:
-            reward = -1
+        if action not in (0, 1, 2, 3):
+            return self.state, 0, False, {}
+        # derived on every step, `state` may have been edited in place
+        row, column = self.state.tolist()
+        state_index = row * self.size + column
+        next_index, reward, done = self.step_index(state_index, int(action))
+        if next_index != state_index:
+            # invalid actions keep the agent and the state object in place
+            self.state = np.array(divmod(next_index, self.size))
         return self.state, reward, done, {}
 
-    def reset(self):
+    def step_index(self, state_index, action):
+        """ allocation free step on the flat state index, the environment itself is not changed
+
+        The successor is read from the transition model, reward and done flag of the reached
+        state from compact tables with one byte per state. Stochastic grids draw the moved
+        direction in O(1) from the alias table of the action, the successors of the model
+        are ordered by direction.
+
+        Args:
+            state_index (int): flat index of the position, see `state_to_index`
+            action (int): action in `[0, 4)`
+
+        Returns:
+            tuple: flat index of the next position, reward and done as python scalars.
+                Invalid actions keep the position and are rewarded with zero.
+        """
+        next_states, valid, rewards, dones, accept, alias = self._step_tables or self._build_step_tables()
+        pair = action * self.all_states + state_index
+        if not valid[pair]:
+            return state_index, 0, False
+        if accept is None:
+            next_state = next_states[pair]
+        else:
+            draw = self._uniform() * 4
+            column = int(draw)
+            entry = action * 4 + column
+            next_state = next_states[pair * 4 + (column if draw - column < accept[entry] else alias[entry])]
+        return next_state, rewards[next_state], dones[next_state]
+
+    def _build_step_tables(self):
+        """ flat memoryviews of the `(n_actions, n_states, K)` successors of the model, of the
+        valid state action pairs and of the int8 rewards and done flags of every state, for
+        stochastic grids also the `(n_actions, 4)` alias tables of the moved direction
+        """
+        model = self.transition_model
+        valid = model.probs.sum(axis=-1) > 0
+        # rewards of the grid are small integers as in the original `step`
+        rewards = self.state_rewards.astype(np.int8)
+        accept = alias = None
+        if self.stochastic:
+            direction_table = AliasTable(self.direction_probs)
+            accept, alias = direction_table.accept.ravel().tolist(), direction_table.alias.ravel().tolist()
+        # memoryviews return python scalars and are indexed much faster than numpy arrays
+        tables = (np.ascontiguousarray(model.next_states), valid, rewards, self.terminal_states)
+        self._step_tables = tuple(memoryview(table.reshape(-1)) for table in tables) + (accept, alias)
+        self._step_config = self.model_config
+        return self._step_tables
+
+    def reset(self, seed=None):
+        if seed is not None:
+            self.seed(seed)
+        if self._step_tables is not None and self._step_config != self.model_config:
+            # goal or bomb were moved
+            self._step_tables = None
         self.state = np.array([0, 0],dtype=np.int32)
         self.valid_action_space = [0, 1]
 
@@ -84,44 +176,220 @@ class GridWorld(Env):
             else:
                 return [0, 1, 2, 3]
 
+    def state_to_index(self, state):
+        """ get the flat index of a position on the grid
+
+        Args:
+            state (np.ndarray): position(s) of shape `(..., 2)`
+
+        Returns:
+            int or np.ndarray: flat index of the position(s)
+        """
+        state = np.asarray(state)
+        return np.ravel_multi_index((state[..., 0], state[..., 1]), (self.size, self.size))
+
+    def index_to_state(self, index):
+        """ get the position on the grid of a flat index
+
+        Args:
+            index (int or np.ndarray): flat index of the position(s)
+
+        Returns:
+            np.ndarray: position(s) of shape `(..., 2)`
+        """
+        return np.stack(np.unravel_index(index, (self.size, self.size)), axis=-1)
+
+    @property
+    def lookup_dict(self):
+        """ dictionary from flat index to position, only built on request
+        """
+        return {count: tuple(state) for count, state in enumerate(self.index_to_state(np.arange(self.all_states)).tolist())}
+
+    @property
+    def lookup_dict_rev(self):
+        """ dictionary from position to flat index, only built on request
+        """
+        return {state: count for count, state in self.lookup_dict.items()}
+
+    @property
+    def transition_model(self):
+        """ sparse transition model of the environment, built on first access
+        """
+        if self.model_cache is not None and self._model_config != self.model_config:
+            # load the tables of the current configuration, e.g. after moving the goal
+            self._model_config = self.model_config
+            tables = self.model_cache.get_or_build(self._model_config, self._build_model_tables)
+            self._transition_model = TransitionModel(tables["next_states"], tables["probs"])
+            self._reward_table = tables["rewards"]
+            self._valid_action_mask = None
+        if self._transition_model is None:
+            self._transition_model = self._build_transition_probabilities()
+        return self._transition_model
+
+    @property
+    def model_config(self):
+        """ configuration which determines the transition and reward tables, key of the model cache
+        """
+        return {"env": type(self).__name__, "size": self.size, "goal_position": list(self.goal_position),
+                "bomb_position": list(self.bomb_position), "slip": self.slip, "wind": self.wind,
+                "model_version": MODEL_VERSION}
+
+    @property
+    def transition_probs(self):
+        """ dense view of the transition probabilities of shape `(n_actions, n_states, n_states)`
+
+        It needs O(n_actions * n_states**2) memory and is only meant for small grids, use
+        `transition_model` or `transition_model.to_csr()` for the sparse representation.
+        """
+        return self.transition_model.to_dense(max_states=self.all_states)
+
+    @property
+    def valid_action_mask(self):
+        """ boolean table of shape `obs_shape + (n_actions,)` marking the valid actions of every position
+        """
+        if self._valid_action_mask is None:
+            valid = self.transition_model.probs.sum(axis=-1) > 0
+            self._valid_action_mask = valid.T.reshape(
+                tuple(self.observation_space.nvec) + (self.action_space.n,))
+        return self._valid_action_mask
+
+    @property
+    def terminal_states(self):
+        """ boolean array of shape `(n_states,)` marking the goal and the bomb
+        """
+        terminal = np.zeros(self.all_states, dtype=bool)
+        terminal[self.state_to_index(self.goal_position)] = True
+        terminal[self.state_to_index(self.bomb_position)] = True
+        return terminal
+
+    @property
+    def state_rewards(self):
+        """ reward of shape `(n_states,)` for moving into a state with a valid action
+        """
+        state_rewards = np.full(self.all_states, -1.0)
+        state_rewards[self.state_to_index(self.goal_position)] = 10.0
+        state_rewards[self.state_to_index(self.bomb_position)] = -10.0
+        return state_rewards
+
+    @property
+    def reward_table(self):
+        """ expected reward of shape `(n_actions, n_states)` for playing an action in a state
+
+        The reward only depends on the state which is reached, invalid actions are
+        rewarded with zero as in `step`.
+        """
+        model = self.transition_model
+        if self._reward_table is not None:
+            # memory mapped table of the model cache
+            return self._reward_table
+        return np.einsum("ijk,ijk->ij", model.probs, self.state_rewards[model.next_states])
+
+    def _build_model_tables(self):
+        """ transition and reward tables as stored in the model cache
+        """
+        model = self._build_transition_probabilities()
+        rewards = np.einsum("ijk,ijk->ij", model.probs, self.state_rewards[model.next_states])
+        return {"next_states": model.next_states, "probs": model.probs, "rewards": rewards}
+
     def _build_transition_probabilities(self):
-        for act in range(self.action_space.n):
-            for count in range(self.all_states):
-                # agent position
-                position = self.lookup_dict[count]
-                self.state = position
-                valid_action = self.get_valid_actions(position)
-                if act in valid_action:
-                    self.step(action=act)
-                    position_after = tuple(self.state)
-                    count_after = self.lookup_dict_rev[position_after]
-                    self.transition_probs[act, count, count_after] = 1
-        # Reset agent position
-        self.reset()
+        # deterministic grids have at most one successor per state action pair, stochastic
+        # grids one per direction. Invalid actions keep the agent in place with probability
+        # zero, moves of a valid action over the border keep the agent in place.
+        directions = np.array([self.action_to_direction[act] for act in range(self.action_space.n)])
+        positions = self.index_to_state(np.arange(self.all_states))
+        next_positions = positions[None, :, :] + directions[:, None, :]
+        inside = np.all((next_positions >= 0) & (next_positions < self.size), axis=-1)
+        next_positions[~inside] = np.broadcast_to(positions, next_positions.shape)[~inside]
+        next_states = self.state_to_index(next_positions)
+        if not self.stochastic:
+            return TransitionModel(
+                next_states=next_states[..., None], probs=inside.astype(np.float64)[..., None])
+        # successor `d` of every action is the neighbour in direction `d`
+        n_actions = self.action_space.n
+        successors = np.broadcast_to(next_states.T[None], (n_actions, self.all_states, n_actions))
+        probs = inside[:, :, None] * self.direction_probs[:, None, :]
+        return TransitionModel(next_states=np.ascontiguousarray(successors), probs=probs)
 
-    def render(self):
+    def _render_grid(self):
+        """ matrix of the grid with 0 for empty cells, 1 for the agent, 2 for the target and 3 for the bomb
+        """
+        grid = np.zeros((self.size, self.size), dtype=np.uint8)
+        grid[self.goal_position[0], self.goal_position[1]] = 2
+        grid[self.bomb_position[0], self.bomb_position[1]] = 3
+        grid[self.state[0], self.state[1]] = 1
+        return grid
+
+    def render(self, mode="human"):
+        """ render the current state of the environment
+
+        Args:
+            mode (str, optional): `human` draws the grid into a single matplotlib figure
+                which is updated in place, `rgb_array` returns an image of shape
+                `(size * render_cell_size, size * render_cell_size, 3)` and `ansi`
+                returns the grid as text. Defaults to "human".
+
+        Returns:
+            np.ndarray or str or None: the rendered frame for `rgb_array` and `ansi`
+        """
+        assert mode in self.metadata["render.modes"], \
+            f"mode has to be one of {self.metadata['render.modes']} but is {mode}"
+        if mode == "ansi":
+            return "\n".join("".join(row) for row in RENDER_SYMBOLS[self._render_grid()])
+        if mode == "rgb_array":
+            cell = self.render_cell_size
+            frame = RENDER_COLORS[self._render_grid()].repeat(cell, axis=0).repeat(cell, axis=1)
+            frame[::cell, :] = RENDER_GRID_COLOR
+            frame[:, ::cell] = RENDER_GRID_COLOR
+            return frame
+        self._render_human()
+        return None
+
+    def _render_human(self):
+        # matplotlib is only needed for the human mode
+        import matplotlib.pyplot as plt
 
         # translate positions of agent, bomb and target in a matrix 
         grid = np.zeros((self.size,self.size))
         grid[self.state[0]][self.state[1]] = 1
         grid[self.goal_position[0]][self.goal_position[1]] = 2
         grid[self.bomb_position[0]][self.bomb_position[1]] = 3
-        
+
+        if self._figure is not None and plt.fignum_exists(self._figure.number):
+            # update the existing figure in place
+            image, agent_text = self._figure_artists
+            image.set_data(grid)
+            agent_text.set_position((self.state[1], self.state[0]))
+            self._figure.canvas.draw_idle()
+            plt.pause(0.001)
+            return
+
         # create a heatmap from the data
-        plt.figure(figsize=(self.size-2, self.size-2))      
-        plt.imshow(grid, cmap='gray', interpolation='none')
+        plt.ion()
+        self._figure = plt.figure(figsize=(self.size-2, self.size-2))
+        image = plt.imshow(grid, cmap='gray', interpolation='none', vmin=0, vmax=3)
         ax = plt.gca()
         ax.set_xticks(np.arange(self.size)-0.5,labels=np.arange(self.size))
         ax.set_yticks(np.arange(self.size)-0.5,labels=np.arange(self.size))
         plt.grid(color='b', lw=2, ls='-')
 
         # plot positions of the agent, the bomb and the target position
-        plt.text(self.state[1],self.state[0],"A",color="lime",size=12,verticalalignment='center', horizontalalignment='center', fontweight='bold')
+        agent_text = plt.text(self.state[1],self.state[0],"A",color="lime",size=12,verticalalignment='center', horizontalalignment='center', fontweight='bold')
         plt.text(self.goal_position[1],self.goal_position[0],"T",color="lime",size=12,verticalalignment='center', horizontalalignment='center', fontweight='bold')
         plt.text(self.bomb_position[1],self.bomb_position[0],"B",color="lime",size=12,verticalalignment='center', horizontalalignment='center', fontweight='bold')
+        self._figure_artists = (image, agent_text)
 
-        # show the plot 
-        plt.show()
+        # show the plot without blocking
+        plt.show(block=False)
+        plt.pause(0.001)
+
+    def close(self):
+        """ close the figure of the `human` render mode
+        """
+        if self._figure is not None:
+            import matplotlib.pyplot as plt
+            plt.close(self._figure)
+            self._figure = None
+            self._figure_artists = None
 
 
 if __name__ =="__main__":
@@ -0,0 +1,84 @@
+import numpy as np
+
+
+class AliasTable():
+    """ Walker alias tables of many discrete distributions over `K` outcomes
+
+    Every distribution is split into `K` columns of equal probability, column `k` is
+    outcome `k` with probability `accept[k]` and outcome `alias[k]` otherwise. Sampling
+    therefore needs one uniform draw and one comparison, independent of `K`.
+
+    The tables of all rows are built together with `K - 1` vectorized pairing steps,
+    which always fill the column of the currently smallest remaining mass from the
+    largest one. Rows without probability mass always sample outcome zero. The tables
+    are stored as float32 and the smallest integer type, i.e. 5 bytes per column for
+    `K <= 127`.
+
+    :param probs: array of shape `(..., K)` with the (unnormalized) probabilities of every row
+    """
+
+    def __init__(self, probs: np.ndarray) -> None:
+        probs = np.asarray(probs, dtype=np.float64)
+        self.shape = probs.shape[:-1]
+        self.n_outcomes = probs.shape[-1]
+        self.accept, self.alias = self._build(probs.reshape(-1, self.n_outcomes))
+
+    def _build(self, probs):
+        n_rows, n_outcomes = probs.shape
+        total = probs.sum(axis=-1, keepdims=True)
+        empty = total[:, 0] <= 0
+        # rows without mass always draw outcome zero
+        probs = np.where(empty[:, None], np.eye(1, n_outcomes), probs)
+        total[empty] = 1.0
+        scaled = probs * (n_outcomes / total)
+
+        accept = np.ones((n_rows, n_outcomes))
+        alias = np.tile(np.arange(n_outcomes), (n_rows, 1))
+        done = np.zeros((n_rows, n_outcomes), dtype=bool)
+        rows = np.arange(n_rows)
+        for _ in range(n_outcomes - 1):
+            small = np.argmin(np.where(done, np.inf, scaled), axis=-1)
+            large = np.argmax(np.where(done, -np.inf, scaled), axis=-1)
+            accept[rows, small] = scaled[rows, small]
+            alias[rows, small] = large
+            done[rows, small] = True
+            # the column of `small` is filled up with mass of `large`
+            scaled[rows, large] -= 1.0 - scaled[rows, small]
+        return np.clip(accept, 0.0, 1.0).astype(np.float32), alias.astype(np.min_scalar_type(-n_outcomes))
+
+    @property
+    def nbytes(self) -> int:
+        return self.accept.nbytes + self.alias.nbytes
+
+    def sample(self, row: int, rng: np.random.Generator) -> int:
+        """ sample the outcome of the flat row index `row`
+        """
+        draw = rng.random() * self.n_outcomes
+        column = int(draw)
+        if draw - column < self.accept[row, column]:
+            return column
+        return int(self.alias[row, column])
+
+    def sample_batch(self, rows: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        """ sample one outcome for every flat row index in `rows`
+
+        Args:
+            rows (np.ndarray): flat row indices of shape `(n,)`, see `np.ravel_multi_index`
+            rng (np.random.Generator): random generator
+
+        Returns:
+            np.ndarray: integer outcomes of shape `(n,)`
+        """
+        draws = rng.random(np.shape(rows)) * self.n_outcomes
+        columns = draws.astype(np.intp)
+        accepted = draws - columns < self.accept[rows, columns]
+        return np.where(accepted, columns, self.alias[rows, columns])
+
+    def probabilities(self) -> np.ndarray:
+        """ normalized distributions of shape `shape + (K,)` represented by the tables
+        """
+        n_rows = self.accept.shape[0]
+        accept = self.accept.astype(np.float64)
+        probs = accept / self.n_outcomes
+        np.add.at(probs, (np.arange(n_rows)[:, None], self.alias), (1.0 - accept) / self.n_outcomes)
+        return probs.reshape(self.shape + (self.n_outcomes,))
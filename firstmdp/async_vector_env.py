@@ -0,0 +1,266 @@
+import multiprocessing as mp
+import traceback
+from multiprocessing import shared_memory
+from typing import Callable, Optional
+
+import numpy as np
+
+# name, shape per environment and dtype of all shared buffers
+_BUFFERS = [
+    ("actions", (), np.int64),
+    ("observations", (2,), np.int64),
+    ("final_observations", (2,), np.int64),
+    ("rewards", (), np.float64),
+    ("dones", (), np.bool_),
+    ("action_masks", (4,), np.bool_),
+]
+
+
+def _attach_buffers(names: dict, num_envs: int):
+    """ attach to the shared memory blocks created by the main process
+    """
+    blocks, arrays = {}, {}
+    for name, shape, dtype in _BUFFERS:
+        # workers share the resource tracker of the main process, which unlinks the blocks
+        block = shared_memory.SharedMemory(name=names[name])
+        blocks[name] = block
+        arrays[name] = np.ndarray((num_envs,) + shape, dtype=dtype, buffer=block.buf)
+    return blocks, arrays
+
+
+def _write_state(arrays: dict, index: int, env) -> None:
+    arrays["observations"][index] = env.state
+    arrays["action_masks"][index] = False
+    arrays["action_masks"][index, env.get_valid_actions(env.state)] = True
+
+
+def _worker(conn, env_fn: Callable, size: int, start: int, stop: int, names: dict,
+            num_envs: int, env_seeds: list) -> None:
+    """ loop of a worker process which owns the environments `start` to `stop`
+    """
+    blocks, arrays = _attach_buffers(names, num_envs)
+    try:
+        envs = [env_fn(size) for _ in range(stop - start)]
+        for env, env_seed in zip(envs, env_seeds):
+            env.seed(env_seed)
+        while True:
+            command = conn.recv()
+            if command == "step":
+                for index, env in enumerate(envs, start=start):
+                    state, reward, done, _info = env.step(int(arrays["actions"][index]))
+                    arrays["final_observations"][index] = state
+                    arrays["rewards"][index] = reward
+                    arrays["dones"][index] = done
+                    if done:
+                        env.reset()
+                    _write_state(arrays, index, env)
+            elif command == "reset":
+                for index, env in enumerate(envs, start=start):
+                    env.reset()
+                    _write_state(arrays, index, env)
+            elif command == "close":
+                break
+            conn.send(("ok", None))
+    except (KeyboardInterrupt, EOFError):
+        pass
+    except Exception:  # pylint: disable=broad-except
+        conn.send(("error", traceback.format_exc()))
+    finally:
+        for block in blocks.values():
+            block.close()
+        conn.close()
+
+
+class AsyncVectorGridWorld():
+    """ steps `num_envs` GridWorld instances in `num_workers` subprocesses
+
+    Every worker owns a contiguous slice of the environments. Actions, observations,
+    rewards and dones are exchanged through `multiprocessing.shared_memory` arrays,
+    only short commands are sent through pipes. Finished environments are reset
+    automatically as in `VectorGridWorld`.
+
+    :param num_envs: number of environments
+    :param size: size of every grid
+    :param num_workers: number of worker processes, defaults to the number of cpus
+    :param seed: root seed, every environment is seeded with `env.seed` with its own child seed,
+        so the results do not depend on `num_workers`
+    :param env_fn: picklable factory `env_fn(size)` of the environments with a `seed` method,
+        defaults to `GridWorld`, e.g. `functools.partial(GridWorld, slip=0.1)`
+    :param context: multiprocessing start method, defaults to the platform default
+    """
+
+    def __init__(self, num_envs: int, size: int, num_workers: Optional[int] = None, seed: Optional[int] = None,
+                 env_fn: Optional[Callable] = None, context: Optional[str] = None) -> None:
+        assert isinstance(num_envs, int) and num_envs > 0, \
+            f"num_envs has to be a positive int but is {num_envs}"
+        if env_fn is None:
+            from firstmdp.Gridsearch import GridWorld
+            env_fn = GridWorld
+        num_workers = min(num_workers or mp.cpu_count(), num_envs)
+        self.num_envs = num_envs
+        self.size = size
+        self.num_workers = num_workers
+        self.closed = False
+        self._waiting = False
+
+        # shared buffers, owned and finally unlinked by this process
+        self._blocks, self._arrays = {}, {}
+        for name, shape, dtype in _BUFFERS:
+            nbytes = max(1, int(np.prod((num_envs,) + shape)) * np.dtype(dtype).itemsize)
+            block = shared_memory.SharedMemory(create=True, size=nbytes)
+            self._blocks[name] = block
+            self._arrays[name] = np.ndarray((num_envs,) + shape, dtype=dtype, buffer=block.buf)
+        names = {name: block.name for name, block in self._blocks.items()}
+
+        ctx = mp.get_context(context)
+        env_seeds = [int(child.generate_state(1, np.uint64)[0])
+                     for child in np.random.SeedSequence(seed).spawn(num_envs)]
+        bounds = np.linspace(0, num_envs, num_workers + 1).astype(int)
+        self._conns, self._processes = [], []
+        for worker in range(num_workers):
+            start, stop = bounds[worker], bounds[worker + 1]
+            parent_conn, child_conn = ctx.Pipe()
+            process = ctx.Process(
+                target=_worker, daemon=True, name=f"AsyncVectorGridWorld-{worker}",
+                args=(child_conn, env_fn, size, start, stop, names, num_envs, env_seeds[start:stop]))
+            process.start()
+            child_conn.close()
+            self._conns.append(parent_conn)
+            self._processes.append(process)
+
+    def _send(self, command: str) -> None:
+        assert not self.closed, "the environment is already closed"
+        assert not self._waiting, "call step_wait before sending a new command"
+        self._waiting = True
+        for worker, conn in enumerate(self._conns):
+            try:
+                conn.send(command)
+            except (BrokenPipeError, ConnectionResetError, OSError):
+                self._waiting = False
+                # the exit code is only known once the dead process is joined
+                self._processes[worker].join(timeout=1.0)
+                exitcode = self._processes[worker].exitcode
+                self.close(terminate=True)
+                raise RuntimeError(f"worker {worker} of AsyncVectorGridWorld died with exit code {exitcode}")
+
+    def _wait(self, timeout: Optional[float] = None) -> None:
+        """ wait for the answer of all workers, closes all workers if one of them failed
+        """
+        for worker, (conn, process) in enumerate(zip(self._conns, self._processes)):
+            try:
+                waited = 0.0
+                while not conn.poll(0.1):
+                    waited += 0.1
+                    if not process.is_alive():
+                        raise EOFError
+                    if timeout is not None and waited >= timeout:
+                        self.close(terminate=True)
+                        raise TimeoutError(f"worker {worker} did not answer within {timeout} seconds")
+                status, message = conn.recv()
+            except (EOFError, ConnectionResetError, BrokenPipeError):
+                process.join(timeout=1.0)
+                status, message = "error", f"worker {worker} died with exit code {process.exitcode}"
+            if status == "error":
+                self._waiting = False
+                self.close(terminate=True)
+                raise RuntimeError(f"worker {worker} of AsyncVectorGridWorld failed:\n{message}")
+        self._waiting = False
+
+    def reset(self) -> np.ndarray:
+        """ reset all environments
+
+        Returns:
+            np.ndarray: observations of shape `(num_envs, 2)`
+        """
+        self._send("reset")
+        self._wait()
+        return self._arrays["observations"].copy()
+
+    def step_async(self, actions: np.ndarray) -> None:
+        """ send the actions to the workers without waiting for the result
+
+        Args:
+            actions (np.ndarray): integer actions of shape `(num_envs,)`
+        """
+        actions = np.asarray(actions)
+        assert actions.shape == (self.num_envs,), \
+            f"actions has to be of shape {(self.num_envs,)} but is {actions.shape}"
+        self._arrays["actions"][:] = actions
+        self._send("step")
+
+    def step_wait(self, timeout: Optional[float] = None):
+        """ wait for the results of the last `step_async`
+
+        Args:
+            timeout (float, optional): seconds to wait for every worker
+
+        Returns:
+            tuple: observations, rewards, dones and an info dict with `action_mask` and
+                `final_observation` as returned by `VectorGridWorld.step`
+        """
+        self._wait(timeout)
+        info = {"action_mask": self._arrays["action_masks"].copy(),
+                "final_observation": self._arrays["final_observations"].copy()}
+        return (self._arrays["observations"].copy(), self._arrays["rewards"].copy(),
+                self._arrays["dones"].copy(), info)
+
+    def step(self, actions: np.ndarray):
+        """ play one step in every environment, see `step_wait`
+        """
+        self.step_async(actions)
+        return self.step_wait()
+
+    def close(self, terminate: bool = False) -> None:
+        """ stop all workers and release the shared memory
+
+        Args:
+            terminate (bool, optional): kill the workers instead of asking them to stop. Defaults to False.
+        """
+        if self.closed:
+            return
+        self.closed = True
+        for conn, process in zip(self._conns, self._processes):
+            if not terminate and process.is_alive():
+                try:
+                    if self._waiting:
+                        conn.recv()
+                    conn.send("close")
+                except (EOFError, BrokenPipeError, ConnectionResetError):
+                    pass
+        for process in self._processes:
+            process.join(timeout=1.0 if not terminate else 0.0)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        for conn in self._conns:
+            conn.close()
+        self._arrays = {}
+        for block in self._blocks.values():
+            block.close()
+            block.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __del__(self) -> None:
+        if not getattr(self, "closed", True):
+            self.close(terminate=True)
+
+
+if __name__ == "__main__":
+    import time
+
+    NUM_ENVS = 256
+    NUM_STEPS = 200
+    with AsyncVectorGridWorld(num_envs=NUM_ENVS, size=10, seed=42) as environments:
+        environments.reset()
+        rng = np.random.default_rng(seed=42)
+        start_time = time.perf_counter()
+        for _ in range(NUM_STEPS):
+            environments.step_async(rng.integers(4, size=NUM_ENVS))
+            observations, rewards, dones, _ = environments.step_wait()
+        elapsed = time.perf_counter() - start_time
+        print(f"{NUM_ENVS * NUM_STEPS / elapsed:.0f} steps per second with {environments.num_workers} workers")
@@ -0,0 +1,84 @@
+from typing import Optional
+
+import numpy as np
+
+
+class FrameRecorder():
+    """ collects `rgb_array` frames of an environment into one preallocated array
+
+    :param env: environment with a `render(mode="rgb_array")` method
+    :param max_frames: maximal number of frames which can be recorded
+    """
+
+    def __init__(self, env, max_frames: int) -> None:
+        assert isinstance(max_frames, int) and max_frames > 0, \
+            f"max_frames has to be a positive int but is {max_frames}"
+        self.env = env
+        self.max_frames = max_frames
+        self.num_frames = 0
+        self._buffer = None
+
+    @property
+    def frames(self) -> np.ndarray:
+        """ view on all recorded frames of shape `(num_frames, height, width, 3)`
+        """
+        if self._buffer is None:
+            return np.zeros((0, 0, 0, 3), dtype=np.uint8)
+        return self._buffer[:self.num_frames]
+
+    def capture(self) -> None:
+        """ render the current state of the environment into the next free frame
+        """
+        assert self.num_frames < self.max_frames, \
+            f"the recorder is full with {self.max_frames} frames"
+        frame = self.env.render(mode="rgb_array")
+        if self._buffer is None:
+            self._buffer = np.empty((self.max_frames,) + frame.shape, dtype=frame.dtype)
+        self._buffer[self.num_frames] = frame
+        self.num_frames += 1
+
+    def record_episode(self, agent, max_steps: Optional[int] = None) -> np.ndarray:
+        """ reset the environment and record a whole episode played by `agent`
+
+        Args:
+            agent (DetAgent): agent with a `get_action(state)` method
+            max_steps (int, optional): maximal number of steps. Defaults to the free frames.
+
+        Returns:
+            np.ndarray: view on all recorded frames
+        """
+        free_frames = self.max_frames - self.num_frames
+        max_steps = free_frames - 1 if max_steps is None else min(max_steps, free_frames - 1)
+        self.env.reset()
+        self.capture()
+        for _ in range(max_steps):
+            action = agent.get_action(self.env.state)
+            _state, _reward, done, _info = self.env.step(action)
+            self.capture()
+            if done:
+                break
+        return self.frames
+
+    def reset(self) -> None:
+        """ forget all recorded frames, the buffer is kept for reuse
+        """
+        self.num_frames = 0
+
+    def save(self, path: str) -> None:
+        """ write all recorded frames into a compressed `.npz` file with key `frames`
+
+        Args:
+            path (str): path of the file
+        """
+        np.savez_compressed(path, frames=self.frames)
+
+
+if __name__ == "__main__":
+    from firstmdp.Gridsearch import GridWorld
+    from firstmdp.gridsearch_agent import DetAgent
+
+    environment = GridWorld(size=5)
+    recorder = FrameRecorder(env=environment, max_frames=100)
+    recorded_frames = recorder.record_episode(DetAgent(env=environment, seed=42))
+    print(f"recorded {recorded_frames.shape[0]} frames of shape {recorded_frames.shape[1:]}")
+    print(environment.render(mode="ansi"))
@@ -1,54 +1,116 @@
-import gym
-
-from typing import Optional, Union
-from gym import spaces
+from typing import TYPE_CHECKING, Optional
 
 import numpy as np
 
-from first_mdp.Gridsearch import GridWorld
+from firstmdp.policies import DeterministicPolicy, StochasticPolicy, TabularPolicy
+
+if TYPE_CHECKING:
+    import gym
 
 
 class DetAgent():
     """ The Agent class enables to play different policies for a given evironment
 
-    :param env: The environment to learn from (if registered in Gym, can be str)
+    :param env: The environment to learn from, defaults to `GridWorld(5)`
     :param use_masking: Whether or not to use invalid action masks during evaluation
     :param seed: Seed for the pseudo random generators
     :param policy_type: the type of the initialization policy
     """
-    def __init__(self, env: Union[gym.Env, str] = GridWorld(5), masking: bool = True, seed: Optional[int] = None, policy_type: str = 'uniform') -> None:
+    # methods timed by `firstmdp.instrumentation.instrument`, `_valid_action_mask` is the masking
+    instrumented_methods = ("get_action", "get_actions", "_valid_action_mask", "update_policy_cache")
+
+    def __init__(self, env: Optional["gym.Env"] = None, masking: bool = True, seed: Optional[int] = None, policy_type: str = 'uniform') -> None:
+        if env is None:
+            # imported here, so that importing the agent does not load gym
+            from firstmdp.Gridsearch import GridWorld
+            env = GridWorld(5)
         self.env = env
-        print(self.env)
         self.masking = masking
         self.rng = np.random.default_rng(seed=seed)
         # size of action space
-        if isinstance(self.env.action_space, spaces.Discrete):
+        # spaces are distinguished by their attributes, `Discrete` has `n`, `MultiDiscrete` has `nvec`
+        if hasattr(self.env.action_space, "n"):
             num_acts = self.env.action_space.n
             self.all_actions = np.arange(num_acts)
-        if isinstance(self.env.observation_space, spaces.MultiDiscrete):
+        if hasattr(self.env.observation_space, "nvec"):
             self.obs_shape = self.env.observation_space.nvec
-            state_type = 'MultiDiscrete'
-        if isinstance(self.env.observation_space, spaces.Discrete):
+        elif hasattr(self.env.observation_space, "n"):
             self.obs_shape = self.env.observation_space.n
-            state_type = 'Discrete'
-        policy_shape = np.append(self.obs_shape, num_acts)
+        self.num_acts = num_acts
+        policy_shape = tuple(np.append(self.obs_shape, num_acts))
 
-        # Init policy # TODO: Als Funktion auslagern?
+        # Init policy
+        self._masked_table = None
+        self._policy_probs = None
         if policy_type == 'uniform':
-            self.policy = np.ones(policy_shape)/num_acts
-        if policy_type == 'greedy' and state_type == 'MultiDiscrete':
-            self.policy = np.zeros(policy_shape)
-            for i in range(self.obs_shape[0]):
-                for j in range(self.obs_shape[1]):
-                    k = np.random.randint(num_acts)
-                    self.policy[i, j, k] = 1
-        if policy_type == 'greedy' and state_type == 'Discrete':
-            self.policy = np.zeros(policy_shape)
-            for i in range(self.obs_shape[0]):
-                for j in range(self.obs_shape[1]):
-                    k = np.random.randint(num_acts)
-                    self.policy[i, j, k] = 1
-        
+            self.policy = StochasticPolicy(np.full(policy_shape, 1/num_acts, dtype=np.float32))
+        if policy_type == 'greedy':
+            if self.masking:
+                # uniform choice among the valid actions of every state
+                actions = np.argmax(self.rng.random(policy_shape) * self._valid_action_mask(), axis=-1)
+            else:
+                actions = self.rng.integers(num_acts, size=policy_shape[:-1])
+            self.policy = DeterministicPolicy(actions, n_actions=num_acts)
+
+    @property
+    def policy(self) -> np.ndarray:
+        """ dense policy table of shape `obs_shape + (n_actions,)` without action masking
+
+        For a `StochasticPolicy` this is the stored table, in-place edits take effect after
+        `update_policy_cache`. A `DeterministicPolicy` returns a read-only one-hot table,
+        which is built once and cached until `update_policy_cache`. Change it with
+        `policy_table.actions[state] = action` and `update_policy_cache` or assign a new
+        table. Assigning a floating point array stores it as `StochasticPolicy` of the same
+        dtype, other arrays as float32. A `TabularPolicy` is stored as it is.
+        """
+        if self._policy_probs is None:
+            self._policy_probs = self.policy_table.probabilities()
+        return self._policy_probs
+
+    @policy.setter
+    def policy(self, policy) -> None:
+        if not isinstance(policy, TabularPolicy):
+            policy = np.asarray(policy)
+            dtype = policy.dtype if np.issubdtype(policy.dtype, np.floating) else np.float32
+            policy = StochasticPolicy(policy, dtype=dtype)
+        self.policy_table = policy
+        self.update_policy_cache()
+
+    def update_policy_cache(self) -> None:
+        """ recomputes the masked policy and its cumulative distribution for all states
+
+        Has to be called after the policy table was changed in place, assigning a new
+        table to `policy` updates the cache automatically.
+        """
+        self._masked_table = None
+        self._policy_probs = None
+
+    @property
+    def masked_table(self) -> TabularPolicy:
+        """ policy which only plays valid actions, cached until the policy changes
+        """
+        if self._masked_table is None:
+            if self.masking:
+                self._masked_table = self.policy_table.masked(self._valid_action_mask())
+            else:
+                self._masked_table = self.policy_table
+            if isinstance(self._masked_table, StochasticPolicy):
+                # keep the cumulative distribution of all states for fast sampling
+                self._masked_table = StochasticPolicy(self._masked_table.probs, cache_cdf=True)
+        return self._masked_table
+
+    @property
+    def masked_policy(self) -> np.ndarray:
+        """ dense policy table where invalid actions have probability zero
+        """
+        return self.masked_table.probabilities()
+
+    @property
+    def policy_cdf(self) -> np.ndarray:
+        """ cumulative distribution of the masked policy along the action axis
+        """
+        return self.masked_table.cdf()
+
     def get_action(self, state: np.ndarray) -> int:
         """samples an action of the environments action space for a given state
 
@@ -63,44 +125,56 @@ class DetAgent():
         except AssertionError:
             print('State shape of Agent and Algorithm do not match')
             raise
-        
-        # Update Probabilities
-        self._update_action_mask_prob(state)
-        # Sample Action
-        action = self.rng.choice(self.all_actions, p=self.policy[tuple(state)])
-        return action
-    
-    def _update_action_mask_prob(self, state: np.ndarray):
-        """Updates the probabilities of all actions for a given state
+
+        return self.masked_table.sample(tuple(state), self.rng)
+
+    def get_actions(self, states: np.ndarray) -> np.ndarray:
+        """samples actions for a batch of states at once
+
+        For stochastic policies one uniform draw per state is used, so for the same seed
+        the actions are equal to calling `get_action` for every state in order.
 
         Args:
-            state (np.ndarray): gamestate of the environment
+            states (np.ndarray): gamestates of shape `(n_states,) + obs_shape.shape`
+
+        Returns:
+            np.ndarray: integer actions of shape `(n_states,)`
+        """
+        try:
+            assert states.shape[1:] == self.obs_shape.shape
+        except AssertionError:
+            print('State shape of Agent and Algorithm do not match')
+            raise
+
+        return self.masked_table.sample_batch(tuple(np.moveaxis(states, -1, 0)), self.rng)
+
+    def _valid_action_mask(self) -> np.ndarray:
+        """ boolean table of shape `obs_shape + (n_actions,)` with all valid actions
         """
-        if self.masking:
-            # Get all possible actions of state:
-            pos_actions = self.env.get_valid_actions(state)
-            not_pos_actions = set(self.all_actions) - set(pos_actions)
-            # Adjust probability of action to legal probabilities
-            state_prob = self.policy[tuple(state)]
-            state_prob[list(not_pos_actions)] = 0.0
-            state_prob = state_prob/sum(state_prob)
-            self.policy[tuple(state)] = state_prob
-        
-        else:
-            self.policy[tuple(state)]
+        if hasattr(self.env, "valid_action_mask"):
+            return self.env.valid_action_mask
+        mask = np.zeros(tuple(np.append(self.obs_shape, self.num_acts)), dtype=bool)
+        for state in np.ndindex(*mask.shape[:-1]):
+            mask[state + (self.env.get_valid_actions(state),)] = True
+        return mask
 
 
 if __name__=="__main__":
+    from firstmdp.Gridsearch import GridWorld
+    from firstmdp.trajectory_buffer import TrajectoryBuffer
 
     NUM_STEPS = 20
     environment = GridWorld(size=5)
     environment.reset()
     agent = DetAgent(env=environment)
+    trajectories = TrajectoryBuffer(capacity=NUM_STEPS)
     for _ in range(NUM_STEPS):
             state = environment.state
             action = agent.get_action(state)
             next_state, reward, done, _ = environment.step(action)
+            trajectories.add(state, action, reward, next_state, done)
             print(f"reward is {reward}, done is {done} and action was {action}")
             environment.render()
             if done==True:
-                environment.reset()
\ No newline at end of file
+                environment.reset()
+    print(f"finished episodes end at steps {trajectories.episode_boundaries()}")
\ No newline at end of file
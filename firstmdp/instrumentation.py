@@ -0,0 +1,194 @@
+import functools
+import json
+import time
+from typing import Callable, Iterable, Optional
+
+from telemetry.latency import LATENCY_BUCKETS, LatencyStats
+
+# call counter and latency histogram of a single method
+MethodStats = LatencyStats
+
+
+class Instrumentation():
+    """ collects call counts, latencies and episode statistics of instrumented objects
+
+    Objects are instrumented with `instrument`, which wraps the methods of the instance
+    only. Objects which are not instrumented run their original methods, so the disabled
+    mode has no overhead.
+
+    :param callback: called with the `snapshot` on `export` and every `export_every` episodes
+    :param export_every: number of finished episodes between two automatic exports
+    :param buckets: upper edges of the latency histograms in seconds
+    """
+
+    def __init__(self, callback: Optional[Callable[[dict], None]] = None, export_every: Optional[int] = None,
+                 buckets: tuple = LATENCY_BUCKETS) -> None:
+        self.callback = callback
+        self.export_every = export_every
+        self.buckets = tuple(buckets)
+        self.reset()
+
+    def reset(self) -> None:
+        """ discard all collected statistics
+        """
+        self.methods = {}
+        self.episodes = 0
+        self.steps = 0
+        # running sums, so memory does not grow with the number of episodes
+        self.episode_stats = {"length": 0, "max_length": 0, "return": 0.0, "squared_return": 0.0,
+                              "min_return": float("inf"), "max_return": float("-inf")}
+        self.start_time = time.perf_counter()
+
+    def method_stats(self, name: str) -> MethodStats:
+        if name not in self.methods:
+            self.methods[name] = MethodStats(self.buckets)
+        return self.methods[name]
+
+    def record_episode(self, length: int, episode_return: float) -> None:
+        self.episodes += 1
+        stats = self.episode_stats
+        stats["length"] += length
+        stats["max_length"] = max(stats["max_length"], length)
+        stats["return"] += episode_return
+        stats["squared_return"] += episode_return ** 2
+        stats["min_return"] = min(stats["min_return"], episode_return)
+        stats["max_return"] = max(stats["max_return"], episode_return)
+        if self.export_every is not None and self.episodes % self.export_every == 0:
+            self.export()
+
+    def snapshot(self) -> dict:
+        """ all statistics as a plain dict
+
+        The `seconds_per_step` of every method is its total time divided by the number of
+        environment steps, which shows how the time of a step is spent. Nested methods,
+        e.g. `step_index` called by `step`, are contained in the time of the caller.
+        """
+        methods = {}
+        for name, stats in sorted(self.methods.items()):
+            methods[name] = stats.to_dict()
+            methods[name]["seconds_per_step"] = stats.total / self.steps if self.steps else 0.0
+        episodes = {"count": self.episodes}
+        if self.episodes:
+            stats = self.episode_stats
+            mean_return = stats["return"] / self.episodes
+            episodes.update({
+                "mean_length": stats["length"] / self.episodes,
+                "max_length": stats["max_length"],
+                "mean_return": mean_return,
+                "std_return": max(stats["squared_return"] / self.episodes - mean_return ** 2, 0.0) ** 0.5,
+                "min_return": stats["min_return"],
+                "max_return": stats["max_return"],
+            })
+        return {"elapsed_seconds": time.perf_counter() - self.start_time, "steps": self.steps,
+                "methods": methods, "episodes": episodes}
+
+    def to_json(self, path: Optional[str] = None) -> str:
+        """ snapshot as json string, written to `path` if given
+        """
+        text = json.dumps(self.snapshot(), indent=2)
+        if path is not None:
+            with open(path, "w", encoding="utf-8") as file:
+                file.write(text)
+        return text
+
+    def export(self) -> dict:
+        """ pass a snapshot to the callback and return it
+        """
+        snapshot = self.snapshot()
+        if self.callback is not None:
+            self.callback(snapshot)
+        return snapshot
+
+
+def _timed(method: Callable, stats: MethodStats) -> Callable:
+    timer = time.perf_counter
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        start = timer()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            stats.record(timer() - start)
+    return wrapper
+
+
+def _tracked_step(step: Callable, reset: Callable, instrumentation: Instrumentation):
+    """ wraps `step` and `reset` of an environment to count steps and record finished episodes
+    """
+    episode = [0, 0.0]
+
+    @functools.wraps(step)
+    def step_wrapper(*args, **kwargs):
+        result = step(*args, **kwargs)
+        instrumentation.steps += 1
+        episode[0] += 1
+        episode[1] += result[1]
+        if result[2]:
+            instrumentation.record_episode(episode[0], float(episode[1]))
+            episode[:] = [0, 0.0]
+        return result
+
+    @functools.wraps(reset)
+    def reset_wrapper(*args, **kwargs):
+        # an unfinished episode is discarded
+        episode[:] = [0, 0.0]
+        return reset(*args, **kwargs)
+    return step_wrapper, reset_wrapper
+
+
+def instrument(obj, instrumentation: Instrumentation, methods: Optional[Iterable[str]] = None):
+    """ record the calls of `methods` of `obj` in `instrumentation`
+
+    The methods are replaced on the instance only, the class and all other instances are
+    unchanged. Single environments with `step` and `reset` additionally report their episodes.
+
+    Args:
+        obj (object): e.g. a `GridWorld` or a `DetAgent`
+        instrumentation (Instrumentation): collector of the statistics
+        methods (Iterable[str], optional): names of the methods. Defaults to `obj.instrumented_methods`.
+
+    Returns:
+        object: `obj`
+    """
+    uninstrument(obj)
+    methods = tuple(methods if methods is not None else getattr(obj, "instrumented_methods", ()))
+    prefix = type(obj).__name__
+    wrapped = {name: _timed(getattr(obj, name), instrumentation.method_stats(f"{prefix}.{name}"))
+               for name in methods}
+    if hasattr(obj, "step") and hasattr(obj, "reset") and not hasattr(obj, "num_envs"):
+        wrapped["step"], wrapped["reset"] = _tracked_step(
+            wrapped.get("step", obj.step), wrapped.get("reset", obj.reset), instrumentation)
+    for name, wrapper in wrapped.items():
+        setattr(obj, name, wrapper)
+    obj._instrumented = tuple(wrapped)
+    return obj
+
+
+def uninstrument(obj):
+    """ restore the original methods of an instrumented object
+
+    Returns:
+        object: `obj`
+    """
+    for name in obj.__dict__.pop("_instrumented", ()):
+        obj.__dict__.pop(name, None)
+    return obj
+
+
+if __name__ == "__main__":
+    from firstmdp.Gridsearch import GridWorld
+    from firstmdp.gridsearch_agent import DetAgent
+
+    environment = GridWorld(size=10)
+    agent = DetAgent(env=environment, seed=42)
+    collector = Instrumentation(callback=lambda snapshot: print(f"{snapshot['episodes']['count']} episodes"),
+                                export_every=50)
+    instrument(environment, collector)
+    instrument(agent, collector)
+    environment.reset()
+    for _ in range(20_000):
+        _state, _reward, done, _info = environment.step(agent.get_action(environment.state))
+        if done:
+            environment.reset()
+    print(collector.to_json())
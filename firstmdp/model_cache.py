@@ -0,0 +1,141 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+# increase whenever the layout or the semantics of the cached tables change
+MODEL_VERSION = 1
+
+# environment variable which overrides the default cache directory
+CACHE_DIR_VARIABLE = "FIRSTMDP_CACHE_DIR"
+
+
+def default_cache_dir() -> str:
+    """ `$FIRSTMDP_CACHE_DIR` if set, otherwise `~/.cache/firstmdp`
+    """
+    return os.environ.get(CACHE_DIR_VARIABLE, os.path.join(os.path.expanduser("~"), ".cache", "firstmdp"))
+
+
+def model_key(config: dict) -> str:
+    """ hash of an environment configuration, equal configurations give equal keys
+
+    Args:
+        config (dict): json serializable configuration, e.g. `GridWorld.model_config`
+
+    Returns:
+        str: hex digest of the configuration together with `MODEL_VERSION`
+    """
+    payload = json.dumps({"model_version": MODEL_VERSION, **config}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+
+class ModelCache():
+    """ on-disk cache of the compiled tables of an mdp, e.g. transition and reward tables
+
+    Every entry is a directory named after `model_key(config)` which holds one raw `.npy`
+    file per table. Tables are loaded with `np.load(mmap_mode="r")`, hence processes
+    using the same entry share the pages of the operating system instead of holding a
+    private copy each. Loaded tables are read-only.
+
+    An entry is written into a temporary directory and renamed in one step, so readers
+    never see a partially written entry. A changed configuration or `MODEL_VERSION`
+    results in a new key and therefore a rebuild.
+
+    :param cache_dir: directory of the cache, defaults to `default_cache_dir()`
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None) -> None:
+        self.cache_dir = cache_dir if cache_dir is not None else default_cache_dir()
+
+    def path(self, config: dict) -> str:
+        """ directory of the entry of `config`
+        """
+        return os.path.join(self.cache_dir, model_key(config))
+
+    def load(self, config: dict) -> Optional[Dict[str, np.ndarray]]:
+        """ memory map the tables of `config`
+
+        Returns:
+            dict: read-only tables by name or None if there is no valid entry
+        """
+        path = self.path(config)
+        try:
+            with open(os.path.join(path, "config.json"), encoding="utf-8") as file:
+                names = json.load(file)["tables"]
+            return {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in names}
+        except (OSError, ValueError, KeyError):
+            # missing or corrupted entry
+            return None
+
+    def save(self, config: dict, tables: Dict[str, np.ndarray]) -> str:
+        """ write the tables of `config` atomically, an existing entry is kept
+
+        Args:
+            config (dict): json serializable configuration of the environment
+            tables (dict): numpy arrays by name
+
+        Returns:
+            str: directory of the entry
+        """
+        path = self.path(config)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = tempfile.mkdtemp(prefix=f".{os.path.basename(path)}-", dir=self.cache_dir)
+        try:
+            for name, table in tables.items():
+                np.save(os.path.join(tmp_path, f"{name}.npy"), np.ascontiguousarray(table))
+            # the description is written last, an entry without it is invalid
+            with open(os.path.join(tmp_path, "config.json"), "w", encoding="utf-8") as file:
+                json.dump({"model_version": MODEL_VERSION, "config": config, "tables": list(tables)},
+                          file, default=str)
+            if os.path.isdir(path) and self.load(config) is None:
+                # replace a corrupted entry
+                shutil.rmtree(path, ignore_errors=True)
+            os.rename(tmp_path, path)
+        except OSError:
+            # another process has written the entry in the meantime
+            if not os.path.isdir(path):
+                raise
+        finally:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+        return path
+
+    def get_or_build(self, config: dict, build: Callable[[], Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+        """ memory map the tables of `config`, build and store them on a cache miss
+
+        Args:
+            config (dict): json serializable configuration of the environment
+            build (Callable): builds the tables by name without arguments
+
+        Returns:
+            dict: read-only memory mapped tables by name
+        """
+        tables = self.load(config)
+        if tables is None:
+            self.save(config, build())
+            tables = self.load(config)
+            assert tables is not None, f"could not load the model cache entry {self.path(config)}"
+        return tables
+
+    def clear(self) -> None:
+        """ delete all entries of the cache
+        """
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    import time
+
+    from firstmdp.Gridsearch import GridWorld
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = ModelCache(directory)
+        for attempt in ("cold", "warm"):
+            start_time = time.perf_counter()
+            environment = GridWorld(500, model_cache=cache)
+            environment.transition_model
+            environment.reward_table
+            print(f"{attempt} cache: model built in {time.perf_counter() - start_time:.4f}s")
@@ -0,0 +1,272 @@
+import time
+from typing import Optional
+
+import numpy as np
+
+from firstmdp.transition_model import TransitionModel
+
+
+class PlanningResult():
+    """ result of a dynamic programming planner
+
+    :param values: state values of shape `(n_states,)`
+    :param q_values: action values of shape `(n_actions, n_states)`, invalid actions are `-inf`
+    :param policy: greedy one-hot policy of shape `(n_states, n_actions)`
+    :param iterations: number of performed iterations
+    :param converged: whether the convergence tolerance was reached
+    :param residuals: sup norm of the value change in every iteration
+    :param elapsed: wall clock time of the planner in seconds
+    """
+
+    def __init__(self, values, q_values, policy, iterations, converged, residuals, elapsed) -> None:
+        self.values = values
+        self.q_values = q_values
+        self.policy = policy
+        self.iterations = iterations
+        self.converged = converged
+        self.residuals = residuals
+        self.elapsed = elapsed
+
+    def __repr__(self) -> str:
+        return (f"PlanningResult(iterations={self.iterations}, converged={self.converged}, "
+                f"residual={self.residuals[-1] if self.residuals else None}, elapsed={self.elapsed:.4f}s)")
+
+
+def bellman_backup(model: TransitionModel, rewards: np.ndarray, values: np.ndarray,
+                   gamma: float, terminal: Optional[np.ndarray] = None) -> np.ndarray:
+    """ computes the action values `R + gamma * P @ V` for all state action pairs at once
+
+    Args:
+        model (TransitionModel): sparse transition model
+        rewards (np.ndarray): expected rewards of shape `(n_actions, n_states)`
+        values (np.ndarray): state values of shape `(n_states,)`
+        gamma (float): discount factor
+        terminal (np.ndarray, optional): boolean mask of terminal states, their value is zero
+
+    Returns:
+        np.ndarray: action values of shape `(n_actions, n_states)`, invalid actions are `-inf`
+    """
+    if terminal is not None:
+        values = np.where(terminal, 0.0, values)
+    q_values = rewards + gamma * model.expected_values(values)
+    q_values[model.probs.sum(axis=-1) <= 0] = -np.inf
+    return q_values
+
+
+def greedy_policy(q_values: np.ndarray) -> np.ndarray:
+    """ one-hot greedy policy of shape `(n_states, n_actions)`, ties go to the lowest action
+    """
+    n_actions, n_states = q_values.shape
+    policy = np.zeros((n_states, n_actions))
+    policy[np.arange(n_states), np.argmax(q_values, axis=0)] = 1.0
+    return policy
+
+
+def _state_values(q_values, terminal):
+    values = q_values.max(axis=0)
+    if terminal is not None:
+        values[terminal] = 0.0
+    return values
+
+
+def _policy_model(model, rewards, actions, terminal):
+    """ transition rows and rewards of a deterministic policy `actions` of shape `(n_states,)`
+    """
+    states = np.arange(model.n_states)
+    next_states = model.next_states[actions, states]
+    probs = model.probs[actions, states]
+    policy_rewards = rewards[actions, states]
+    if terminal is not None:
+        probs = np.where(terminal[:, None], 0.0, probs)
+        policy_rewards = np.where(terminal, 0.0, policy_rewards)
+    return next_states, probs, policy_rewards
+
+
+def _sparse_solver():
+    """ scipy sparse module and solver or None, scipy is optional and only imported when needed
+    """
+    try:
+        from scipy import sparse
+        from scipy.sparse.linalg import spsolve
+    except ImportError:  # policies are then evaluated iteratively
+        return None
+    return sparse, spsolve
+
+
+def evaluate_policy(model: TransitionModel, rewards: np.ndarray, actions: np.ndarray, gamma: float,
+                    terminal: Optional[np.ndarray] = None, values: Optional[np.ndarray] = None,
+                    tol: float = 1e-8, max_iter: Optional[int] = None) -> np.ndarray:
+    """ evaluates a deterministic policy
+
+    If `max_iter` is None the linear system `(I - gamma * P_pi) V = R_pi` is solved
+    exactly with a sparse solver if scipy is available. Otherwise at most `max_iter`
+    sweeps `V <- R_pi + gamma * P_pi V` are performed starting from `values`.
+
+    Args:
+        model (TransitionModel): sparse transition model
+        rewards (np.ndarray): expected rewards of shape `(n_actions, n_states)`
+        actions (np.ndarray): action of the policy in every state, shape `(n_states,)`
+        gamma (float): discount factor
+        terminal (np.ndarray, optional): boolean mask of terminal states
+        values (np.ndarray, optional): start values for the iterative evaluation
+        tol (float, optional): tolerance of the iterative evaluation. Defaults to 1e-8.
+        max_iter (int, optional): number of sweeps of the iterative evaluation
+
+    Returns:
+        np.ndarray: state values of shape `(n_states,)`
+    """
+    next_states, probs, policy_rewards = _policy_model(model, rewards, actions, terminal)
+    solver = _sparse_solver() if max_iter is None and gamma < 1 else None
+    if solver is not None:
+        sparse, spsolve = solver
+        rows = np.repeat(np.arange(model.n_states), model.n_successors)
+        p_pi = sparse.csr_matrix((probs.ravel(), (rows, next_states.ravel())),
+                                 shape=(model.n_states, model.n_states))
+        system = sparse.identity(model.n_states, format="csr") - gamma * p_pi
+        return np.asarray(spsolve(system.tocsc(), policy_rewards))
+
+    values = np.zeros(model.n_states) if values is None else values.copy()
+    for _ in range(max_iter if max_iter is not None else 100_000):
+        new_values = policy_rewards + gamma * np.einsum("jk,jk->j", probs, values[next_states])
+        residual = np.max(np.abs(new_values - values))
+        values = new_values
+        if residual < tol:
+            break
+    return values
+
+
+def value_iteration(model: TransitionModel, rewards: np.ndarray, gamma: float = 0.9,
+                    terminal: Optional[np.ndarray] = None, tol: float = 1e-8,
+                    max_iter: int = 10_000) -> PlanningResult:
+    """ synchronous value iteration
+
+    Args:
+        model (TransitionModel): sparse transition model
+        rewards (np.ndarray): expected rewards of shape `(n_actions, n_states)`
+        gamma (float, optional): discount factor. Defaults to 0.9.
+        terminal (np.ndarray, optional): boolean mask of terminal states
+        tol (float, optional): stop if the sup norm of the value change is below. Defaults to 1e-8.
+        max_iter (int, optional): maximal number of iterations. Defaults to 10_000.
+
+    Returns:
+        PlanningResult: values, greedy policy and iteration statistics
+    """
+    start = time.perf_counter()
+    values = np.zeros(model.n_states)
+    residuals = []
+    converged = False
+    for _ in range(max_iter):
+        q_values = bellman_backup(model, rewards, values, gamma, terminal)
+        new_values = _state_values(q_values, terminal)
+        residuals.append(float(np.max(np.abs(new_values - values))))
+        values = new_values
+        if residuals[-1] < tol:
+            converged = True
+            break
+    q_values = bellman_backup(model, rewards, values, gamma, terminal)
+    return PlanningResult(values, q_values, greedy_policy(q_values), len(residuals),
+                          converged, residuals, time.perf_counter() - start)
+
+
+def modified_policy_iteration(model: TransitionModel, rewards: np.ndarray, gamma: float = 0.9,
+                              terminal: Optional[np.ndarray] = None, eval_steps: Optional[int] = 10,
+                              tol: float = 1e-8, max_iter: int = 10_000) -> PlanningResult:
+    """ modified policy iteration, which evaluates every greedy policy with `eval_steps` sweeps
+
+    With `eval_steps=None` every policy is evaluated exactly, which is policy iteration.
+
+    Args:
+        model (TransitionModel): sparse transition model
+        rewards (np.ndarray): expected rewards of shape `(n_actions, n_states)`
+        gamma (float, optional): discount factor. Defaults to 0.9.
+        terminal (np.ndarray, optional): boolean mask of terminal states
+        eval_steps (int, optional): number of evaluation sweeps per policy. Defaults to 10.
+        tol (float, optional): stop if the sup norm of the value change is below. Defaults to 1e-8.
+        max_iter (int, optional): maximal number of policy improvements. Defaults to 10_000.
+
+    Returns:
+        PlanningResult: values, greedy policy and iteration statistics
+    """
+    start = time.perf_counter()
+    values = np.zeros(model.n_states)
+    actions = None
+    residuals = []
+    converged = False
+    for _ in range(max_iter):
+        q_values = bellman_backup(model, rewards, values, gamma, terminal)
+        new_actions = np.argmax(q_values, axis=0)
+        if eval_steps is None and actions is not None and np.array_equal(new_actions, actions):
+            # the policy is stable, hence optimal
+            residuals.append(0.0)
+            converged = True
+            break
+        actions = new_actions
+        new_values = evaluate_policy(model, rewards, actions, gamma, terminal, values=values,
+                                     tol=tol, max_iter=eval_steps)
+        residuals.append(float(np.max(np.abs(new_values - values))))
+        values = new_values
+        if residuals[-1] < tol:
+            converged = True
+            break
+    q_values = bellman_backup(model, rewards, values, gamma, terminal)
+    return PlanningResult(values, q_values, greedy_policy(q_values), len(residuals),
+                          converged, residuals, time.perf_counter() - start)
+
+
+def policy_iteration(model: TransitionModel, rewards: np.ndarray, gamma: float = 0.9,
+                     terminal: Optional[np.ndarray] = None, tol: float = 1e-8,
+                     max_iter: int = 1_000) -> PlanningResult:
+    """ policy iteration with exact policy evaluation
+
+    Args:
+        model (TransitionModel): sparse transition model
+        rewards (np.ndarray): expected rewards of shape `(n_actions, n_states)`
+        gamma (float, optional): discount factor. Defaults to 0.9.
+        terminal (np.ndarray, optional): boolean mask of terminal states
+        tol (float, optional): tolerance of the policy evaluation. Defaults to 1e-8.
+        max_iter (int, optional): maximal number of policy improvements. Defaults to 1_000.
+
+    Returns:
+        PlanningResult: values, greedy policy and iteration statistics
+    """
+    return modified_policy_iteration(model, rewards, gamma, terminal, eval_steps=None,
+                                     tol=tol, max_iter=max_iter)
+
+
+PLANNERS = {
+    "value_iteration": value_iteration,
+    "policy_iteration": policy_iteration,
+    "modified_policy_iteration": modified_policy_iteration,
+}
+
+
+def plan(env, method: str = "value_iteration", **kwargs) -> PlanningResult:
+    """ plans an optimal policy for an environment with a sparse transition model like `GridWorld`
+
+    The policy of the result has the layout `obs_shape + (n_actions,)` of `DetAgent.policy`,
+    the values have the layout `obs_shape`.
+
+    Args:
+        env (GridWorld): environment with `transition_model`, `reward_table` and `terminal_states`
+        method (str, optional): one of `PLANNERS`. Defaults to "value_iteration".
+
+    Returns:
+        PlanningResult: values, greedy policy and iteration statistics
+    """
+    assert method in PLANNERS, f"method has to be one of {list(PLANNERS)} but is {method}"
+    result = PLANNERS[method](env.transition_model, env.reward_table,
+                              terminal=env.terminal_states, **kwargs)
+    obs_shape = tuple(env.observation_space.nvec)
+    result.values = result.values.reshape(obs_shape)
+    result.policy = result.policy.reshape(obs_shape + (env.action_space.n,))
+    return result
+
+
+if __name__ == "__main__":
+    from firstmdp.Gridsearch import GridWorld
+
+    environment = GridWorld(size=5)
+    for name in PLANNERS:
+        planning_result = plan(environment, method=name)
+        print(name, planning_result)
+        print(np.argmax(planning_result.policy, axis=-1))
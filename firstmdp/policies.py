@@ -0,0 +1,167 @@
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+
+def mask_probabilities(probs: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """ sets the probability of invalid actions to zero and renormalizes all states at once
+
+    States without any probability mass on valid actions play uniformly among them.
+
+    Args:
+        probs (np.ndarray): policy table of shape `obs_shape + (n_actions,)`
+        mask (np.ndarray): boolean table of the valid actions with the same shape
+
+    Returns:
+        np.ndarray: masked policy table with the dtype of `probs`
+    """
+    masked = np.where(mask, probs, 0)
+    total = masked.sum(axis=-1, keepdims=True)
+    masked = np.where(total > 0, masked, mask).astype(probs.dtype)
+    masked /= masked.sum(axis=-1, keepdims=True)
+    return masked
+
+
+class TabularPolicy(ABC):
+    """ storage of a policy over a finite state space
+
+    :param obs_shape: shape of the state space
+    :param n_actions: number of actions
+    """
+
+    def __init__(self, obs_shape: tuple, n_actions: int) -> None:
+        self.obs_shape = tuple(obs_shape)
+        self.n_actions = n_actions
+
+    @property
+    @abstractmethod
+    def nbytes(self) -> int:
+        """ memory of the policy table in bytes
+        """
+
+    @abstractmethod
+    def probabilities(self) -> np.ndarray:
+        """ dense policy table of shape `obs_shape + (n_actions,)`
+        """
+
+    @abstractmethod
+    def masked(self, mask: np.ndarray) -> "TabularPolicy":
+        """ policy which only plays valid actions
+
+        Args:
+            mask (np.ndarray): boolean table of shape `obs_shape + (n_actions,)`
+        """
+
+    @abstractmethod
+    def sample(self, state: tuple, rng: np.random.Generator) -> int:
+        """ sample the action for a single state
+
+        Args:
+            state (tuple): index of the state
+            rng (np.random.Generator): random generator
+        """
+
+    @abstractmethod
+    def sample_batch(self, states: tuple, rng: np.random.Generator) -> np.ndarray:
+        """ sample the actions for a batch of states
+
+        Args:
+            states (tuple): tuple of index arrays, one per dimension of the state space
+            rng (np.random.Generator): random generator
+        """
+
+    def cdf(self) -> np.ndarray:
+        """ cumulative distribution along the action axis, exactly one after the last
+        action with positive probability
+        """
+        cdf = np.cumsum(self.probabilities(), axis=-1)
+        return cdf / cdf[..., -1:]
+
+
+class DeterministicPolicy(TabularPolicy):
+    """ deterministic policy stored as an int8 table of actions, one byte per state
+
+    :param actions: integer table of shape `obs_shape`
+    :param n_actions: number of actions
+    """
+
+    def __init__(self, actions: np.ndarray, n_actions: int) -> None:
+        assert n_actions <= np.iinfo(np.int8).max, f"int8 can not store {n_actions} actions"
+        super().__init__(np.shape(actions), n_actions)
+        self.actions = np.asarray(actions, dtype=np.int8)
+
+    @property
+    def nbytes(self) -> int:
+        return self.actions.nbytes
+
+    def probabilities(self) -> np.ndarray:
+        """ one-hot table built from `actions`, read-only because edits would be lost
+        """
+        probs = np.zeros(self.obs_shape + (self.n_actions,))
+        np.put_along_axis(probs, self.actions[..., None].astype(np.intp), 1.0, axis=-1)
+        probs.flags.writeable = False
+        return probs
+
+    def masked(self, mask: np.ndarray) -> TabularPolicy:
+        valid = np.take_along_axis(mask, self.actions[..., None].astype(np.intp), axis=-1)
+        if valid.all():
+            return self
+        # fall back to a uniform choice among the valid actions where the action is invalid
+        return StochasticPolicy(mask_probabilities(self.probabilities().astype(np.float32), mask),
+                                cache_cdf=True)
+
+    def sample(self, state: tuple, rng: np.random.Generator) -> int:
+        return int(self.actions[state])
+
+    def sample_batch(self, states: tuple, rng: np.random.Generator) -> np.ndarray:
+        return self.actions[states].astype(np.int64)
+
+
+class StochasticPolicy(TabularPolicy):
+    """ stochastic policy stored as a table of float32 probabilities
+
+    :param probs: table of shape `obs_shape + (n_actions,)`, used without copy if it has `dtype`
+    :param cache_cdf: keep the cumulative distribution of all states for fast sampling
+    :param dtype: floating point type of the table
+    """
+
+    def __init__(self, probs: np.ndarray, cache_cdf: bool = False, dtype=np.float32) -> None:
+        probs = np.asarray(probs, dtype=dtype)
+        super().__init__(probs.shape[:-1], probs.shape[-1])
+        self.probs = probs
+        self.cache_cdf = cache_cdf
+        self._cdf = None
+
+    @property
+    def nbytes(self) -> int:
+        return self.probs.nbytes + (self._cdf.nbytes if self._cdf is not None else 0)
+
+    def probabilities(self) -> np.ndarray:
+        return self.probs
+
+    def cdf(self) -> np.ndarray:
+        if self._cdf is not None:
+            return self._cdf
+        cdf = super().cdf()
+        if self.cache_cdf:
+            self._cdf = cdf
+        return cdf
+
+    def masked(self, mask: np.ndarray) -> TabularPolicy:
+        return StochasticPolicy(mask_probabilities(self.probs, mask), cache_cdf=self.cache_cdf,
+                                dtype=self.probs.dtype)
+
+    def _row_cdf(self, states):
+        if self._cdf is not None or self.cache_cdf:
+            return self.cdf()[states]
+        cdf = np.cumsum(self.probs[states], axis=-1)
+        return cdf / cdf[..., -1:]
+
+    def sample(self, state: tuple, rng: np.random.Generator) -> int:
+        return int(np.searchsorted(self._row_cdf(state), rng.random(), side='right'))
+
+    def sample_batch(self, states: tuple, rng: np.random.Generator) -> np.ndarray:
+        cdf = self._row_cdf(states)
+        uniforms = rng.random(cdf.shape[0])
+        # number of cdf entries below the draw is the sampled action
+        return np.sum(cdf <= uniforms[:, None], axis=-1)
@@ -0,0 +1,349 @@
+import time
+from typing import Optional
+
+import numpy as np
+
+from firstmdp.planning import greedy_policy
+
+
+class BatchSimulator():
+    """ plays many episodes of an environment with a sparse transition model in lockstep
+
+    States are flat indices, the transitions are the ones of `GridWorld.step`: invalid
+    actions keep the agent in place with reward zero, valid actions are rewarded with
+    `state_rewards` of the reached state and terminal states end the episode.
+
+    :param env: environment with `transition_model`, `state_rewards` and `terminal_states`
+    """
+
+    def __init__(self, env) -> None:
+        model = env.transition_model
+        self.env = env
+        self.n_states = model.n_states
+        self.n_actions = model.n_actions
+        self.model = model
+        self.next_states = model.next_states
+        self.valid = model.probs.sum(axis=-1) > 0
+        self.state_rewards = env.state_rewards
+        self.terminal = env.terminal_states
+        self._start_state = None
+
+    @property
+    def start_state(self) -> int:
+        """ flat index of the state after `env.reset()`
+
+        Determined on first access by resetting the environment, its previous `state` is
+        restored afterwards, so creating a simulator does not touch a running episode.
+        """
+        if self._start_state is None:
+            state = self.env.state
+            self.env.reset()
+            self._start_state = int(self.env.state_to_index(self.env.state))
+            self.env.state = state
+        return self._start_state
+
+    def step(self, states: np.ndarray, actions: np.ndarray, rng: np.random.Generator):
+        """ play one step in all episodes
+
+        Args:
+            states (np.ndarray): flat states of shape `(n,)`
+            actions (np.ndarray): actions of shape `(n,)`
+            rng (np.random.Generator): random generator for stochastic transitions, which are
+                sampled in O(1) per step with the alias tables of the model
+
+        Returns:
+            tuple: next states, rewards and dones of shape `(n,)`
+        """
+        next_states = self.model.sample_next_states(states, actions, rng)
+        valid = self.valid[actions, states]
+        next_states = np.where(valid, next_states, states)
+        rewards = np.where(valid, self.state_rewards[next_states], 0.0)
+        dones = valid & self.terminal[next_states]
+        return next_states, rewards, dones
+
+
+class EvaluationResult():
+    """ result of a Monte Carlo policy evaluation
+
+    :param values: state values of shape `obs_shape`, unvisited states are nan
+    :param q_values: action values of shape `obs_shape + (n_actions,)`, unvisited pairs are nan
+    :param visits: number of used returns per state action pair, shape `obs_shape + (n_actions,)`
+    :param episode_returns: discounted return of every episode from the start state
+    :param episode_lengths: number of steps of every episode
+    :param truncated: fraction of episodes which hit the step limit
+    :param history: largest change of the state values after every batch of episodes
+    :param elapsed: wall clock time in seconds
+    """
+
+    def __init__(self, values, q_values, visits, episode_returns, episode_lengths, truncated, history, elapsed) -> None:
+        self.values = values
+        self.q_values = q_values
+        self.visits = visits
+        self.episode_returns = episode_returns
+        self.episode_lengths = episode_lengths
+        self.truncated = truncated
+        self.history = history
+        self.elapsed = elapsed
+
+    def __repr__(self) -> str:
+        return (f"EvaluationResult(episodes={len(self.episode_returns)}, "
+                f"mean_return={np.mean(self.episode_returns):.4f}, truncated={self.truncated:.3f}, "
+                f"elapsed={self.elapsed:.4f}s)")
+
+
+class TrainingResult():
+    """ result of tabular Q-learning or SARSA
+
+    :param q_values: action values of shape `obs_shape + (n_actions,)`, invalid actions are `-inf`
+    :param policy: greedy one-hot policy of shape `obs_shape + (n_actions,)`
+    :param episodes: number of finished episodes
+    :param steps: number of played steps per environment
+    :param history: list of dicts with `steps`, `episodes`, `max_update` and `mean_return`
+    :param converged: whether the largest update of an interval was below the tolerance
+    :param elapsed: wall clock time in seconds
+    """
+
+    def __init__(self, q_values, policy, episodes, steps, history, converged, elapsed) -> None:
+        self.q_values = q_values
+        self.policy = policy
+        self.episodes = episodes
+        self.steps = steps
+        self.history = history
+        self.converged = converged
+        self.elapsed = elapsed
+
+    def __repr__(self) -> str:
+        return (f"TrainingResult(episodes={self.episodes}, steps={self.steps}, "
+                f"converged={self.converged}, elapsed={self.elapsed:.4f}s)")
+
+
+def _rollout(simulator: BatchSimulator, agent, num_episodes: int, max_steps: int):
+    """ plays `num_episodes` episodes of `agent` in lockstep
+
+    Returns:
+        tuple: states, actions, rewards and alive mask of shape `(steps, num_episodes)`
+            and the mask of shape `(num_episodes,)` of the unfinished episodes
+    """
+    states = np.full(num_episodes, simulator.start_state)
+    alive = np.ones(num_episodes, dtype=bool)
+    trace_states, trace_actions, trace_rewards, trace_alive = [], [], [], []
+    for _ in range(max_steps):
+        actions = agent.get_actions(simulator.env.index_to_state(states))
+        next_states, rewards, dones = simulator.step(states, actions, agent.rng)
+        trace_states.append(states)
+        trace_actions.append(actions)
+        trace_rewards.append(np.where(alive, rewards, 0.0))
+        trace_alive.append(alive)
+        alive = alive & ~dones
+        states = next_states
+        if not alive.any():
+            break
+    return (np.array(trace_states), np.array(trace_actions),
+            np.array(trace_rewards), np.array(trace_alive), alive)
+
+
+def _first_visits(keys: np.ndarray, alive: np.ndarray) -> np.ndarray:
+    """ mask of shape `(steps, n)` marking the first occurrence of every key within its episode
+    """
+    num_steps, num_episodes = keys.shape
+    episode_keys = keys.astype(np.int64) * num_episodes + np.arange(num_episodes)
+    # time major flattening, so that the first index of a key is its first visit
+    flat = np.where(alive, episode_keys, -1).ravel()
+    _, first = np.unique(flat, return_index=True)
+    mask = np.zeros(flat.shape, dtype=bool)
+    mask[first] = True
+    return mask.reshape(num_steps, num_episodes) & alive
+
+
+def monte_carlo_evaluation(env, agent, num_episodes: int = 1_000, gamma: float = 0.9,
+                           first_visit: bool = False, max_steps: int = 200, batch_size: int = 1_000,
+                           tol: Optional[float] = None) -> EvaluationResult:
+    """ estimates the state and action values of the policy of `agent` with Monte Carlo
+
+    Episodes are played in lockstep batches of `batch_size`, the returns of every batch are
+    scattered into the value tables with one `np.bincount` call.
+
+    Args:
+        env (GridWorld): environment with a sparse transition model
+        agent (DetAgent): agent with a batched `get_actions` method
+        num_episodes (int, optional): maximal number of episodes. Defaults to 1_000.
+        gamma (float, optional): discount factor. Defaults to 0.9.
+        first_visit (bool, optional): only use the first visit of a state (action pair)
+            within an episode. Defaults to False, which is every-visit Monte Carlo.
+        max_steps (int, optional): episode cap, longer episodes are truncated. Defaults to 200.
+        batch_size (int, optional): number of episodes played in lockstep. Defaults to 1_000.
+        tol (float, optional): stop early if the state values change less than `tol` after a batch
+
+    Returns:
+        EvaluationResult: value estimates and episode statistics
+    """
+    start = time.perf_counter()
+    simulator = BatchSimulator(env)
+    n_states, n_actions = simulator.n_states, simulator.n_actions
+    return_sums = np.zeros(n_states * n_actions)
+    visit_counts = np.zeros(n_states * n_actions)
+    state_sums = np.zeros(n_states)
+    state_counts = np.zeros(n_states)
+    values = np.full(n_states, np.nan)
+    episode_returns, episode_lengths, history = [], [], []
+    num_truncated = 0
+    played = 0
+    while played < num_episodes:
+        batch = min(batch_size, num_episodes - played)
+        states, actions, rewards, alive, unfinished = _rollout(simulator, agent, batch, max_steps)
+        # discounted returns, computed backwards for all episodes at once
+        returns = np.zeros(rewards.shape)
+        running = np.zeros(batch)
+        for step in range(len(rewards) - 1, -1, -1):
+            running = np.where(alive[step], rewards[step] + gamma * running, 0.0)
+            returns[step] = running
+        keys = states * n_actions + actions
+        used = _first_visits(keys, alive) if first_visit else alive
+        return_sums += np.bincount(keys[used], weights=returns[used], minlength=n_states * n_actions)
+        visit_counts += np.bincount(keys[used], minlength=n_states * n_actions)
+
+        state_used = _first_visits(states, alive) if first_visit else alive
+        state_sums += np.bincount(states[state_used], weights=returns[state_used], minlength=n_states)
+        state_counts += np.bincount(states[state_used], minlength=n_states)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            new_values = state_sums / state_counts
+        change = np.nanmax(np.abs(new_values - values)) if played > 0 else np.inf
+        history.append(float(change))
+        values = new_values
+        episode_returns.append(returns[0])
+        episode_lengths.append(alive.sum(axis=0))
+        num_truncated += int(unfinished.sum())
+        played += batch
+        if tol is not None and change < tol:
+            break
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        q_values = (return_sums / visit_counts).reshape(n_states, n_actions)
+    obs_shape = tuple(env.observation_space.nvec)
+    return EvaluationResult(
+        values=values.reshape(obs_shape),
+        q_values=q_values.reshape(obs_shape + (n_actions,)),
+        visits=visit_counts.reshape(obs_shape + (n_actions,)),
+        episode_returns=np.concatenate(episode_returns),
+        episode_lengths=np.concatenate(episode_lengths),
+        truncated=num_truncated / played,
+        history=history,
+        elapsed=time.perf_counter() - start)
+
+
+def _epsilon_greedy(q_values: np.ndarray, valid: np.ndarray, states: np.ndarray,
+                    epsilon: float, rng: np.random.Generator) -> np.ndarray:
+    """ epsilon greedy actions among the valid actions for a batch of flat states
+    """
+    masked = np.where(valid[states], q_values[states], -np.inf)
+    greedy = np.argmax(masked, axis=1)
+    # uniform among the valid actions: largest random key of all valid actions
+    random_actions = np.argmax(rng.random(masked.shape) * valid[states], axis=1)
+    return np.where(rng.random(len(states)) < epsilon, random_actions, greedy)
+
+
+def train_tabular(env, algorithm: str = "q_learning", num_episodes: int = 10_000, num_envs: int = 256,
+                  alpha: float = 0.1, gamma: float = 0.9, epsilon: float = 0.1, max_steps: int = 200,
+                  eval_interval: int = 100, tol: Optional[float] = None,
+                  seed: Optional[int] = None) -> TrainingResult:
+    """ tabular Q-learning or SARSA with `num_envs` environments in lockstep
+
+    All environments are stepped at once and the temporal difference updates of a step are
+    applied with one `np.bincount` scatter. The td errors of equal state action pairs within
+    a step are averaged, hence the step size is `alpha` independent of `num_envs`.
+
+    Args:
+        env (GridWorld): environment with a sparse transition model
+        algorithm (str, optional): `q_learning` or `sarsa`. Defaults to "q_learning".
+        num_episodes (int, optional): stop after this many finished episodes. Defaults to 10_000.
+        num_envs (int, optional): number of environments in lockstep. Defaults to 256.
+        alpha (float, optional): learning rate. Defaults to 0.1.
+        gamma (float, optional): discount factor. Defaults to 0.9.
+        epsilon (float, optional): exploration rate of the behaviour policy. Defaults to 0.1.
+        max_steps (int, optional): episode cap, longer episodes are restarted. Defaults to 200.
+        eval_interval (int, optional): steps between two entries of the history. Defaults to 100.
+        tol (float, optional): stop if the largest update within an interval is below `tol`
+        seed (int, optional): seed of the random generator
+
+    Returns:
+        TrainingResult: action values, greedy policy and training statistics
+    """
+    assert algorithm in ("q_learning", "sarsa"), f"algorithm has to be q_learning or sarsa but is {algorithm}"
+    start = time.perf_counter()
+    rng = np.random.default_rng(seed=seed)
+    simulator = BatchSimulator(env)
+    valid = simulator.valid.T
+    q_values = np.zeros((simulator.n_states, simulator.n_actions))
+
+    states = np.full(num_envs, simulator.start_state)
+    actions = _epsilon_greedy(q_values, valid, states, epsilon, rng)
+    lengths = np.zeros(num_envs, dtype=np.int64)
+    returns = np.zeros(num_envs)
+    finished_returns = []
+    history = []
+    episodes = 0
+    steps = 0
+    max_update = 0.0
+    converged = False
+    while episodes < num_episodes:
+        next_states, rewards, dones = simulator.step(states, actions, rng)
+        next_actions = _epsilon_greedy(q_values, valid, next_states, epsilon, rng)
+        if algorithm == "q_learning":
+            bootstrap = np.where(valid[next_states], q_values[next_states], -np.inf).max(axis=1)
+        else:
+            bootstrap = q_values[next_states, next_actions]
+        targets = rewards + gamma * np.where(dones, 0.0, bootstrap)
+        # average the td errors of equal state action pairs, so the step size stays alpha
+        keys = states * simulator.n_actions + actions
+        td_sums = np.bincount(keys, weights=targets - q_values[states, actions], minlength=q_values.size)
+        counts = np.bincount(keys, minlength=q_values.size)
+        visited = np.flatnonzero(counts)
+        updates = alpha * td_sums[visited] / counts[visited]
+        q_values.reshape(-1)[visited] += updates
+        max_update = max(max_update, float(np.max(np.abs(updates))))
+
+        # bookkeeping and restart of finished or truncated episodes
+        returns += rewards * gamma ** lengths
+        lengths += 1
+        restart = dones | (lengths >= max_steps)
+        if restart.any():
+            finished_returns.extend(returns[restart].tolist())
+            episodes += int(restart.sum())
+            next_states = np.where(restart, simulator.start_state, next_states)
+            next_actions[restart] = _epsilon_greedy(q_values, valid, next_states[restart], epsilon, rng)
+            lengths[restart] = 0
+            returns[restart] = 0.0
+        states, actions = next_states, next_actions
+        steps += 1
+
+        if steps % eval_interval == 0:
+            history.append({"steps": steps, "episodes": episodes, "max_update": max_update,
+                            "mean_return": float(np.mean(finished_returns)) if finished_returns else float("nan")})
+            finished_returns = []
+            if tol is not None and max_update < tol:
+                converged = True
+                break
+            max_update = 0.0
+
+    masked_q_values = np.where(valid, q_values, -np.inf)
+    obs_shape = tuple(env.observation_space.nvec)
+    policy = greedy_policy(masked_q_values.T)
+    return TrainingResult(
+        q_values=masked_q_values.reshape(obs_shape + (simulator.n_actions,)),
+        policy=policy.reshape(obs_shape + (simulator.n_actions,)),
+        episodes=episodes, steps=steps, history=history, converged=converged,
+        elapsed=time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    from firstmdp.Gridsearch import GridWorld
+    from firstmdp.gridsearch_agent import DetAgent
+
+    environment = GridWorld(size=20)
+    evaluation = monte_carlo_evaluation(environment, DetAgent(env=environment, seed=42),
+                                        num_episodes=5_000, first_visit=True)
+    print(evaluation)
+    training = train_tabular(environment, algorithm="q_learning", num_episodes=20_000, seed=42)
+    print(training)
+    print(np.argmax(training.policy, axis=-1))
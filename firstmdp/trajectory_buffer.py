@@ -0,0 +1,295 @@
+import os
+from typing import Iterator, List, Optional
+
+import numpy as np
+
+# bits of the `flags` field of a transition
+DONE_FLAG = 1
+TRUNCATED_FLAG = 2
+
+# one transition needs 16 bytes
+TRANSITION_DTYPE = np.dtype([
+    ("state", np.int16, (2,)),
+    ("action", np.int8),
+    ("reward", np.float32),
+    ("next_state", np.int16, (2,)),
+    ("flags", np.uint8),
+    ("env_id", np.uint16),
+])
+
+# value range of the integer fields, checked before storing since numpy casts wrap silently
+_LIMITS = {name: (int(np.iinfo(TRANSITION_DTYPE[name].base).min),
+                  int(np.iinfo(TRANSITION_DTYPE[name].base).max))
+           for name in ("state", "action", "next_state", "env_id")}
+
+
+def _check_range(name: str, low, high) -> None:
+    """ raise a ValueError if the values between `low` and `high` do not fit into the field `name`
+    """
+    min_value, max_value = _LIMITS[name]
+    if low < min_value or high > max_value:
+        raise ValueError(f"{name} has to be in [{min_value}, {max_value}] "
+                         f"but contains {low if low < min_value else high}")
+
+
+class TrajectoryBuffer():
+    """ stores transitions of GridWorld rollouts in a preallocated structured numpy ring buffer
+
+    Without `spill_dir` the oldest transitions are overwritten once the ring is full.
+    With `spill_dir` a full ring is written to a `.npy` segment in this directory, which
+    is memory-mapped read only, and the ring starts again. All transitions stay
+    available in chronological order.
+
+    Every transition stores the `env_id` of its environment, so the interleaved steps of
+    a vector environment are split into episodes per environment.
+
+    Positions are stored as int16 and `env_id` as uint16, i.e. grids up to a size of 32768
+    and 65536 environments. `add` and `add_batch` raise a ValueError for larger values.
+
+    :param capacity: number of transitions held in memory
+    :param spill_dir: directory for the memory-mapped segments
+    """
+
+    def __init__(self, capacity: int, spill_dir: Optional[str] = None) -> None:
+        assert isinstance(capacity, int) and capacity > 0, \
+            f"capacity has to be a positive int but is {capacity}"
+        self.capacity = capacity
+        self.spill_dir = spill_dir
+        if spill_dir is not None:
+            os.makedirs(spill_dir, exist_ok=True)
+        self.segments: List[np.ndarray] = []
+        self._ring = np.zeros(capacity, dtype=TRANSITION_DTYPE)
+        self._head = 0  # position of the next write
+        self._size = 0  # number of valid transitions in the ring
+
+    def __len__(self) -> int:
+        return sum(len(segment) for segment in self.segments) + self._size
+
+    @property
+    def nbytes(self) -> int:
+        """ memory of the ring buffer in bytes, spilled segments live on disk
+        """
+        return self._ring.nbytes
+
+    def add(self, state, action: int, reward: float, next_state, done: bool, truncated: bool = False,
+            env_id: int = 0) -> None:
+        """ store a single transition
+
+        Args:
+            state (np.ndarray): position before the step
+            action (int): played action
+            reward (float): reward of the step
+            next_state (np.ndarray): position after the step
+            done (bool): whether the episode is finished
+            truncated (bool, optional): whether the episode was cut off. Defaults to False.
+            env_id (int, optional): environment which played the step. Defaults to 0.
+
+        Raises:
+            ValueError: if a position, the action or `env_id` does not fit into its field
+        """
+        for name, values in (("state", state), ("next_state", next_state)):
+            values = np.asarray(values).tolist()
+            _check_range(name, min(values), max(values))
+        _check_range("action", action, action)
+        _check_range("env_id", env_id, env_id)
+        if self._size == self.capacity and self.spill_dir is not None:
+            self._spill()
+        record = self._ring[self._head]
+        record["state"] = state
+        record["action"] = action
+        record["reward"] = reward
+        record["next_state"] = next_state
+        record["flags"] = DONE_FLAG * bool(done) | TRUNCATED_FLAG * bool(truncated)
+        record["env_id"] = env_id
+        self._advance(1)
+
+    def add_batch(self, states: np.ndarray, actions: np.ndarray, rewards: np.ndarray,
+                  next_states: np.ndarray, dones: np.ndarray, truncated: Optional[np.ndarray] = None,
+                  env_ids: Optional[np.ndarray] = None) -> None:
+        """ store a batch of transitions, e.g. one step of a `VectorGridWorld`
+
+        Args:
+            states (np.ndarray): positions before the step, shape `(n, 2)`
+            actions (np.ndarray): played actions, shape `(n,)`
+            rewards (np.ndarray): rewards, shape `(n,)`
+            next_states (np.ndarray): positions after the step, shape `(n, 2)`
+            dones (np.ndarray): finished episodes, shape `(n,)`
+            truncated (np.ndarray, optional): cut off episodes, shape `(n,)`
+            env_ids (np.ndarray, optional): environments which played the steps, shape `(n,)`,
+                defaults to `0, ..., n - 1` as in one step of a vector environment
+
+        Raises:
+            ValueError: if a position, an action or an env id does not fit into its field
+        """
+        if env_ids is None:
+            env_ids = np.arange(len(actions))
+        for name, values in (("state", states), ("action", actions), ("next_state", next_states),
+                             ("env_id", env_ids)):
+            values = np.asarray(values)
+            if values.size > 0:
+                _check_range(name, values.min(), values.max())
+        batch = np.empty(len(actions), dtype=TRANSITION_DTYPE)
+        batch["state"] = states
+        batch["action"] = actions
+        batch["reward"] = rewards
+        batch["next_state"] = next_states
+        flags = np.where(dones, DONE_FLAG, 0)
+        if truncated is not None:
+            flags |= np.where(truncated, TRUNCATED_FLAG, 0)
+        batch["flags"] = flags
+        batch["env_id"] = env_ids
+        while len(batch) > 0:
+            if self._size == self.capacity and self.spill_dir is not None:
+                self._spill()
+            count = min(len(batch), self.capacity - self._head)
+            self._ring[self._head:self._head + count] = batch[:count]
+            self._advance(count)
+            batch = batch[count:]
+
+    def _advance(self, count: int) -> None:
+        self._head = (self._head + count) % self.capacity
+        self._size = min(self._size + count, self.capacity)
+
+    def _spill(self) -> None:
+        """ write the full ring into a memory-mapped segment and empty the ring
+        """
+        path = os.path.join(self.spill_dir, f"segment_{len(self.segments):06d}.npy")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as file:
+            np.save(file, self._ring)
+        os.replace(tmp_path, path)
+        self.segments.append(np.load(path, mmap_mode="r"))
+        self._head = 0
+        self._size = 0
+
+    def chunks(self) -> List[np.ndarray]:
+        """ zero-copy views on all stored transitions in chronological order
+
+        Returns:
+            list: memory-mapped segments followed by at most two views on the ring
+        """
+        if self._size < self.capacity:
+            # the ring has not wrapped around yet
+            ring = [self._ring[:self._size]]
+        else:
+            ring = [self._ring[self._head:], self._ring[:self._head]]
+        return self.segments + [chunk for chunk in ring if len(chunk) > 0]
+
+    def __getitem__(self, index) -> np.ndarray:
+        """ transitions `index` of the chronological order
+
+        An int returns a single record. A slice which lies inside one chunk is returned as
+        a zero-copy view, other indices are gathered into a new array.
+        """
+        if isinstance(index, (int, np.integer)):
+            return self._gather(np.array([index]))[0]
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            offset = 0
+            for chunk in self.chunks():
+                if offset <= start and stop <= offset + len(chunk):
+                    return chunk[start - offset:stop - offset:step]
+                offset += len(chunk)
+            index = np.arange(start, stop, step)
+        return self._gather(np.atleast_1d(index))
+
+    def _gather(self, indices: np.ndarray) -> np.ndarray:
+        size = len(self)
+        indices = np.where(indices < 0, indices + size, indices)
+        if indices.size > 0 and (indices.min() < 0 or indices.max() >= size):
+            raise IndexError(f"index out of range for a buffer of {size} transitions")
+        result = np.empty(len(indices), dtype=TRANSITION_DTYPE)
+        offset = 0
+        for chunk in self.chunks():
+            inside = (indices >= offset) & (indices < offset + len(chunk))
+            result[inside] = chunk[indices[inside] - offset]
+            offset += len(chunk)
+        return result
+
+    def sample(self, batch_size: int, rng: np.random.Generator, contiguous: bool = False) -> np.ndarray:
+        """ sample a mini-batch of transitions
+
+        Args:
+            batch_size (int): number of transitions
+            rng (np.random.Generator): random generator
+            contiguous (bool, optional): if True a random window of consecutive transitions
+                inside one chunk is returned as a zero-copy view. Defaults to False.
+
+        Returns:
+            np.ndarray: structured array of transitions
+        """
+        if not contiguous:
+            return self._gather(rng.integers(len(self), size=batch_size))
+        chunks = [chunk for chunk in self.chunks() if len(chunk) >= batch_size]
+        assert chunks, f"no chunk holds {batch_size} consecutive transitions"
+        lengths = np.array([len(chunk) - batch_size + 1 for chunk in chunks])
+        position = rng.integers(lengths.sum())
+        chunk_idx = int(np.searchsorted(np.cumsum(lengths), position, side="right"))
+        start = position - (lengths[:chunk_idx].sum())
+        return chunks[chunk_idx][start:start + batch_size]
+
+    def _field(self, name: str) -> np.ndarray:
+        """ one field of all transitions in chronological order
+        """
+        chunks = self.chunks()
+        if not chunks:
+            return np.zeros(0, dtype=TRANSITION_DTYPE[name])
+        return np.concatenate([chunk[name] for chunk in chunks])
+
+    def episode_boundaries(self) -> np.ndarray:
+        """ indices of all transitions which end an episode
+
+        Returns:
+            np.ndarray: sorted indices of finished or cut off episodes of all environments
+        """
+        return np.flatnonzero(self._field("flags") & (DONE_FLAG | TRUNCATED_FLAG))
+
+    def episodes(self) -> Iterator[np.ndarray]:
+        """ iterate over all complete episodes ordered by their last transition
+
+        The chunks are processed one after another, the transitions of a chunk are grouped
+        per `env_id` with a stable sort. Only the indices of the unfinished episodes are
+        kept between chunks. An episode which is stored contiguously inside one chunk,
+        e.g. of a single environment, is a view.
+        """
+        # global indices of the unfinished episode of every environment
+        pending = {}
+        offset = 0
+        for chunk in self.chunks():
+            env_ids = np.asarray(chunk["env_id"])
+            ends = (np.asarray(chunk["flags"]) & (DONE_FLAG | TRUNCATED_FLAG)) != 0
+            order = np.argsort(env_ids, kind="stable")
+            groups = np.split(order, np.flatnonzero(np.diff(env_ids[order])) + 1)
+            finished = []
+            for group in groups:
+                env_id = int(env_ids[group[0]])
+                # an episode starts after the previous end of the same environment
+                pieces = np.split(group + offset, np.flatnonzero(ends[group]) + 1)
+                for piece in pieces[:-1]:
+                    parts = pending.pop(env_id, [])
+                    finished.append(np.concatenate(parts + [piece]) if parts else piece)
+                if len(pieces[-1]) > 0:
+                    pending.setdefault(env_id, []).append(pieces[-1])
+            finished.sort(key=lambda indices: indices[-1])
+            for indices in finished:
+                if indices[0] >= offset and indices[-1] - indices[0] + 1 == len(indices):
+                    yield chunk[indices[0] - offset:indices[-1] - offset + 1]
+                else:
+                    yield self._gather(indices)
+            offset += len(chunk)
+
+if __name__ == "__main__":
+    from firstmdp.vector_env import VectorGridWorld
+
+    NUM_ENVS = 64
+    environments = VectorGridWorld(num_envs=NUM_ENVS, size=5)
+    buffer = TrajectoryBuffer(capacity=100_000)
+    rng = np.random.default_rng(seed=42)
+    observations = environments.reset()
+    for _ in range(1_000):
+        actions = rng.integers(4, size=NUM_ENVS)
+        next_observations, rewards, dones, info = environments.step(actions)
+        buffer.add_batch(observations, actions, rewards, info["final_observation"], dones)
+        observations = next_observations
+    print(f"stored {len(buffer)} transitions in {buffer.nbytes / 1e6} MB")
+    print(buffer.sample(batch_size=4, rng=rng))
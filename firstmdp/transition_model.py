@@ -0,0 +1,147 @@
+from typing import Optional, Sequence
+
+import numpy as np
+
+from firstmdp.alias import AliasTable
+
+
+def direction_probabilities(slip: float = 0.0, wind: Optional[Sequence[float]] = None) -> np.ndarray:
+    """ probabilities of the direction which is actually moved for every action of a grid
+
+    Actions and directions are ordered down, right, up, left. With probability `slip` the
+    agent slips to one of the two perpendicular directions, each with `slip / 2`. Independent
+    of the action the wind blows the agent into direction `d` with probability `wind[d]`.
+
+    Args:
+        slip (float, optional): probability of slipping sideways. Defaults to 0.0.
+        wind (Sequence[float], optional): probability of being blown into every direction,
+            the sum has to be at most one
+
+    Returns:
+        np.ndarray: array of shape `(4, 4)`, row `a` is the distribution of the direction of action `a`
+    """
+    assert 0.0 <= slip <= 1.0, f"slip has to be a probability but is {slip}"
+    wind = np.zeros(4) if wind is None else np.asarray(wind, dtype=np.float64)
+    assert wind.shape == (4,) and np.all(wind >= 0) and wind.sum() <= 1.0 + 1e-12, \
+        f"wind has to be four non negative probabilities with sum at most one but is {wind}"
+    actions = np.arange(4)
+    probs = np.zeros((4, 4))
+    probs[actions, actions] = 1.0 - slip
+    probs[actions, (actions + 1) % 4] += slip / 2
+    probs[actions, (actions + 3) % 4] += slip / 2
+    return (1.0 - wind.sum()) * probs + wind[None, :]
+
+
+class TransitionModel():
+    """ compact representation of the transition probabilities of a finite mdp
+
+    Instead of a dense tensor of shape `(n_actions, n_states, n_states)` the model
+    stores for every state action pair a fixed number `K` of successor states
+    together with their probabilities. For deterministic environments `K` is one,
+    so the memory is linear in the number of states.
+
+    :param next_states: integer array of shape `(n_actions, n_states, K)` with the
+        flat index of the successor states
+    :param probs: float array of shape `(n_actions, n_states, K)` with the probability
+        of the corresponding successor state. Rows of invalid actions are zero.
+    """
+
+    def __init__(self, next_states: np.ndarray, probs: np.ndarray) -> None:
+        assert next_states.shape == probs.shape, \
+            f"shapes of next_states {next_states.shape} and probs {probs.shape} do not match"
+        assert next_states.ndim == 3, \
+            f"next_states has to be of shape (n_actions, n_states, K) but is {next_states.shape}"
+        self.next_states = next_states
+        self.probs = probs
+        self.n_actions, self.n_states, self.n_successors = next_states.shape
+        self._dense = None
+        self._csr = None
+        self._alias_table = None
+
+    @property
+    def nbytes(self) -> int:
+        """ memory used by the compact representation in bytes
+        """
+        return self.next_states.nbytes + self.probs.nbytes
+
+    def expected_values(self, values: np.ndarray) -> np.ndarray:
+        """ computes `sum_s' P(s'|s,a) * values[s']` for all state action pairs
+
+        This is the sparse matrix vector product `P_a @ values` for every action
+        and costs O(n_actions * n_states * K).
+
+        Args:
+            values (np.ndarray): array of shape `(n_states,)`
+
+        Returns:
+            np.ndarray: array of shape `(n_actions, n_states)`
+        """
+        return np.einsum("ijk,ijk->ij", self.probs, values[self.next_states])
+
+    @property
+    def alias_table(self) -> AliasTable:
+        """ alias tables of the successor distributions of all state action pairs, built on first access
+        """
+        if self._alias_table is None:
+            self._alias_table = AliasTable(self.probs.reshape(-1, self.n_successors))
+        return self._alias_table
+
+    def sample_next_states(self, states: np.ndarray, actions: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        """ samples a successor for every state action pair in O(1) with the alias tables
+
+        Args:
+            states (np.ndarray): flat states of shape `(n,)`
+            actions (np.ndarray): actions of shape `(n,)`
+            rng (np.random.Generator): random generator, unused for deterministic models
+
+        Returns:
+            np.ndarray: flat successor states of shape `(n,)`
+        """
+        if self.n_successors == 1:
+            return self.next_states[actions, states, 0]
+        rows = np.asarray(actions) * self.n_states + states
+        columns = self.alias_table.sample_batch(rows, rng)
+        return self.next_states.reshape(-1, self.n_successors)[rows, columns]
+
+    def to_csr(self) -> list:
+        """ returns the model as a list of `scipy.sparse.csr_matrix`, one per action
+
+        Returns:
+            list: sparse matrices of shape `(n_states, n_states)`
+        """
+        if self._csr is None:
+            from scipy import sparse
+            rows = np.repeat(np.arange(self.n_states), self.n_successors)
+            self._csr = [
+                sparse.csr_matrix(
+                    (self.probs[act].ravel(), (rows, self.next_states[act].ravel())),
+                    shape=(self.n_states, self.n_states))
+                for act in range(self.n_actions)]
+        return self._csr
+
+    def to_dense(self, max_states: int = 2_500) -> np.ndarray:
+        """ returns the dense transition tensor of shape `(n_actions, n_states, n_states)`
+
+        The dense view needs O(n_actions * n_states**2) memory and is therefore only
+        available for small models.
+
+        Args:
+            max_states (int, optional): largest number of states for which a dense
+                tensor is built. Defaults to 2_500, i.e. 200 MB for four actions.
+
+        Returns:
+            np.ndarray: dense transition tensor
+
+        Raises:
+            ValueError: if the model has more than `max_states` states
+        """
+        if self.n_states > max_states:
+            raise ValueError(f"dense transition tensor with {self.n_states} states is too large, "
+                             f"use the sparse arrays or to_csr() instead or raise max_states")
+        if self._dense is None:
+            dense = np.zeros((self.n_actions, self.n_states, self.n_states))
+            act_idx = np.arange(self.n_actions)[:, None, None]
+            state_idx = np.arange(self.n_states)[None, :, None]
+            np.add.at(dense, (act_idx, state_idx, self.next_states), self.probs)
+            self._dense = dense
+        return self._dense
@@ -0,0 +1,135 @@
+import numpy as np
+
+from firstmdp.alias import AliasTable
+from firstmdp.transition_model import direction_probabilities
+
+
+class VectorGridWorld():
+    """ batched version of `GridWorld` which steps `num_envs` environments with
+    a single numpy call
+
+    All agent positions are stored in one array of shape `(num_envs, 2)`. The
+    transitions are identical to `GridWorld.step`, finished environments are
+    reset automatically.
+
+    :param num_envs: number of environments
+    :param size: size of every grid
+    :param slip: probability of slipping sideways, see `direction_probabilities`
+    :param wind: probability of being blown into every direction, see `direction_probabilities`
+    :param seed: seed of the random generator of the stochastic transitions
+    """
+
+    def __init__(self, num_envs: int, size: int, slip: float = 0.0, wind=None, seed=None) -> None:
+        assert isinstance(num_envs, int) and num_envs > 0, \
+            f"num_envs has to be a positive int but is {num_envs}"
+        assert isinstance(size, int), f"size has to be an int but is {type(size)}"
+        assert size > 2, f"size has to be greater than 2 but is {size}"
+        self.num_envs = num_envs
+        self.size = size
+        # same ordering as `GridWorld.action_to_direction`
+        self.directions = np.array([[1, 0], [0, 1], [-1, 0], [0, -1]], dtype=np.int32)
+        self.goal_position = np.array([size-1, size-1], dtype=np.int32)
+        self.bomb_position = np.array([size-2, size-2], dtype=np.int32)
+        self.positions = np.zeros((num_envs, 2), dtype=np.int32)
+        self._env_idx = np.arange(num_envs)
+        # the moved direction of stochastic grids only depends on the action
+        self.direction_probs = direction_probabilities(slip, wind)
+        self.stochastic = bool(slip > 0 or (wind is not None and sum(wind) > 0))
+        self.direction_table = AliasTable(self.direction_probs) if self.stochastic else None
+        self.rng = np.random.default_rng(seed)
+
+    @property
+    def observation_space(self):
+        """ `MultiDiscrete` space of a single environment, gym is only imported on access
+        """
+        from gym import spaces
+        return spaces.MultiDiscrete([self.size, self.size])
+
+    @property
+    def action_space(self):
+        """ `Discrete` space of a single environment, gym is only imported on access
+        """
+        from gym import spaces
+        return spaces.Discrete(4)
+
+    def reset(self) -> np.ndarray:
+        """ reset all environments to the start position
+
+        Returns:
+            np.ndarray: observations of shape `(num_envs, 2)`
+        """
+        self.positions[:] = 0
+        return self.positions.copy()
+
+    def get_valid_action_mask(self, positions: np.ndarray = None) -> np.ndarray:
+        """ get a boolean mask of all valid actions for a batch of positions
+
+        Args:
+            positions (np.ndarray, optional): positions of shape `(n, 2)`. Defaults to
+                the current positions of all environments.
+
+        Returns:
+            np.ndarray: boolean mask of shape `(n, 4)`
+        """
+        if positions is None:
+            positions = self.positions
+        mask = np.empty((positions.shape[0], 4), dtype=bool)
+        np.less(positions[:, 0], self.size-1, out=mask[:, 0])
+        np.less(positions[:, 1], self.size-1, out=mask[:, 1])
+        np.greater(positions[:, 0], 0, out=mask[:, 2])
+        np.greater(positions[:, 1], 0, out=mask[:, 3])
+        return mask
+
+    def step(self, actions: np.ndarray):
+        """ play one step in every environment
+
+        Args:
+            actions (np.ndarray): integer actions of shape `(num_envs,)`, actions outside
+                `[0, 4)` are invalid and keep the agent in place like in `GridWorld.step`
+
+        Returns:
+            tuple: observations `(num_envs, 2)`, rewards `(num_envs,)`, dones `(num_envs,)`
+                and an info dict with the valid `action_mask` of the returned observations
+                and the `final_observation` of all environments before the automatic reset
+        """
+        actions = np.asarray(actions)
+        assert actions.shape == (self.num_envs,), \
+            f"actions has to be of shape {(self.num_envs,)} but is {actions.shape}"
+        in_range = (actions >= 0) & (actions < 4)
+        # negative actions would wrap around, index with a valid placeholder instead
+        actions = np.where(in_range, actions, 0)
+        valid = self.get_valid_action_mask()[self._env_idx, actions] & in_range
+        if self.stochastic:
+            moved = self.positions + self.directions[self.direction_table.sample_batch(actions, self.rng)]
+            # moves of a valid action over the border keep the agent in place
+            valid_move = valid & np.all((moved >= 0) & (moved < self.size), axis=1)
+            self.positions = np.where(valid_move[:, None], moved, self.positions)
+        else:
+            moved = self.positions + self.directions[actions]
+            self.positions = np.where(valid[:, None], moved, self.positions)
+
+        at_goal = (self.positions == self.goal_position).all(axis=1)
+        at_bomb = (self.positions == self.bomb_position).all(axis=1)
+        rewards = np.where(at_goal, 10.0, np.where(at_bomb, -10.0, -1.0))
+        rewards[~valid] = 0.0
+        dones = valid & (at_goal | at_bomb)
+
+        # reset finished environments
+        final_observation = self.positions.copy()
+        self.positions[dones] = 0
+        info = {"action_mask": self.get_valid_action_mask(),
+                "final_observation": final_observation}
+        return self.positions.copy(), rewards, dones, info
+
+
+if __name__ == "__main__":
+    NUM_ENVS = 8
+    environments = VectorGridWorld(num_envs=NUM_ENVS, size=5)
+    observations = environments.reset()
+    rng = np.random.default_rng(seed=42)
+    for _ in range(20):
+        action_mask = environments.get_valid_action_mask()
+        # choose uniformly between the valid actions
+        actions = np.argmax(rng.random(action_mask.shape) * action_mask, axis=1)
+        observations, rewards, dones, _ = environments.step(actions)
+        print(f"rewards are {rewards}, dones are {dones}")
@@ -1,51 +1,139 @@
+import functools
+import hashlib
 import json
-import scipy.stats as stats
-import random
-import re
-import json 
+import os
+import tempfile
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import numpy as np
+import scipy
+import scipy.stats as stats
+
+BOUNDS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bounds.json")
 
-def create_distributions(num_rep = 3):
+# increase whenever the layout or the semantics of the cached catalog change
+CATALOG_VERSION = 1
 
-    # Get a list of all distributions in scipy.stats
-    distributions = [getattr(stats, name) for name in dir(
-        stats) if isinstance(getattr(stats, name), stats.rv_continuous)]
+# environment variable which overrides the default cache directory
+CACHE_DIR_VARIABLE = "GUMBEL_EXP_CACHE_DIR"
+
+# infinite parameter bounds are replaced by these values
+PARAMETER_LIMIT = 50.0
+
+
+def default_cache_dir() -> str:
+    """ `$GUMBEL_EXP_CACHE_DIR` if set, otherwise `~/.cache/gumbel_exp`
+    """
+    return os.environ.get(CACHE_DIR_VARIABLE, os.path.join(os.path.expanduser("~"), ".cache", "gumbel_exp"))
 
-    with open("gumbel_exp/bounds.json", "r") as file:
+
+def build_catalog(bounds_path: str = BOUNDS_PATH) -> dict:
+    """ shape parameters and their bounds of all continuous distributions of scipy.stats
+
+    The shape names are read from `dist.shapes`. Distributions with a shape parameter
+    without bounds in `bounds_path` are skipped.
+
+    Args:
+        bounds_path (str, optional): json file with the bounds of the shape parameters.
+            Defaults to `BOUNDS_PATH`.
+
+    Returns:
+        dict: for every distribution name the shape names and their lower and upper bounds,
+            infinite bounds are clipped to `PARAMETER_LIMIT`
+    """
+    with open(bounds_path, "r") as file:
         bounds_for_parameter = json.load(file)
-    
-    PATTERN = r'rvs\(([^\)]+)\)'
+    catalog = {}
+    for name in sorted(dir(stats)):
+        dist = getattr(stats, name)
+        if not isinstance(dist, stats.rv_continuous):
+            continue
+        shapes = [shape.strip() for shape in dist.shapes.split(",")] if dist.shapes else []
+        bounds = bounds_for_parameter.get(dist.name, {})
+        if any(shape not in bounds for shape in shapes):
+            continue
+        catalog[dist.name] = {
+            "shapes": shapes,
+            "lower_bounds": [max(float(bounds[shape]["lower_bound"]), -PARAMETER_LIMIT) for shape in shapes],
+            "upper_bounds": [min(float(bounds[shape]["upper_bound"]), PARAMETER_LIMIT) for shape in shapes],
+        }
+    return catalog
 
-    # get the parameter names and default values
-    distribution_to_use = []
-    for _ in range(num_rep):
-        for dist in distributions:
-            dis_use = {"parameter": {}}
-            dis_use["name"] = dist.name
-            dis_use["parameter"]["loc"] = 0.0
-            dis_use["parameter"]["scale"] = random.uniform(0.5, 1.5)
-
-            docstring = getattr(stats, f"{dist.name}").__doc__
-
-            match = re.search(PATTERN, docstring)
-            if match:
-                params_str = match.group(1)
-                params = [p.strip() for p in params_str.split(',')]
-                params.remove('random_state=None')
-                params.remove('size=1')
-                params.remove('loc=0')
-                params.remove('scale=1')
-            for param in params:
-                lower_bound = -50.0 if float(bounds_for_parameter[f"{dist.name}"][f"{param}"]["lower_bound"]) == float(
-                    "-inf") else float(bounds_for_parameter[f"{dist.name}"][f"{param}"]["lower_bound"])
-                upper_bound = 50.0 if float(bounds_for_parameter[f"{dist.name}"][f"{param}"]["upper_bound"]) == float(
-                    "inf") else float(bounds_for_parameter[f"{dist.name}"][f"{param}"]["upper_bound"])
-
-                dis_use["parameter"][param] = random.uniform(
-                    lower_bound, upper_bound)
-
-            distribution_to_use.append(dis_use)
 
+def _catalog_path(cache_dir: str, bounds_path: str) -> str:
+    with open(bounds_path, "rb") as file:
+        bounds_hash = hashlib.sha256(file.read()).hexdigest()[:16]
+    return os.path.join(cache_dir, f"catalog-v{CATALOG_VERSION}-scipy-{scipy.__version__}-{bounds_hash}.json")
+
+
+@functools.lru_cache(maxsize=None)
+def load_catalog(cache_dir: Optional[str] = None, bounds_path: str = BOUNDS_PATH) -> dict:
+    """ `build_catalog` memoized in the process and persisted on disk
+
+    The cache file is keyed by `CATALOG_VERSION`, the scipy version and the content of
+    `bounds_path`, so upgrading scipy or editing the bounds results in a rebuild. The file
+    is written to a temporary file and renamed in one step. Do not modify the result.
+
+    Args:
+        cache_dir (str, optional): directory of the cache, defaults to `default_cache_dir()`
+        bounds_path (str, optional): json file with the bounds of the shape parameters
+
+    Returns:
+        dict: catalog of `build_catalog`
+    """
+    cache_dir = cache_dir if cache_dir is not None else default_cache_dir()
+    path = _catalog_path(cache_dir, bounds_path)
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        # missing or corrupted cache file
+        pass
+    catalog = build_catalog(bounds_path)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        descriptor, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        with os.fdopen(descriptor, "w", encoding="utf-8") as file:
+            json.dump(catalog, file)
+        os.replace(tmp_path, path)
+    except OSError:
+        # a read-only cache only costs the rebuild
+        pass
+    return catalog
+
+
+def create_distributions(num_rep: int = 3, rng: Optional[np.random.Generator] = None) -> list:
+    """ random configurations of all distributions of the catalog
+
+    For every repetition every distribution of `load_catalog()` is configured with `loc=0`,
+    a scale uniform in [0.5, 1.5] and shape parameters uniform within their bounds. All
+    values of a distribution are drawn at once for all repetitions.
+
+    Args:
+        num_rep (int, optional): number of configurations of every distribution. Defaults to 3.
+        rng (np.random.Generator, optional): random generator of the parameters
+
+    Returns:
+        list: dicts with the `name` and the `parameter` of the distributions, ordered by
+            repetition and name
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    catalog = load_catalog()
+    columns = []
+    for name, entry in catalog.items():
+        scales = rng.uniform(0.5, 1.5, size=num_rep).tolist()
+        values = rng.uniform(entry["lower_bounds"], entry["upper_bounds"],
+                             size=(num_rep, len(entry["shapes"]))).tolist()
+        columns.append((name, entry["shapes"], scales, values))
+
+    distribution_to_use = []
+    for rep in range(num_rep):
+        for name, shapes, scales, values in columns:
+            parameter = {"loc": 0.0, "scale": scales[rep]}
+            parameter.update(zip(shapes, values[rep]))
+            distribution_to_use.append({"parameter": parameter, "name": name})
     return distribution_to_use
 
 
@@ -62,22 +150,161 @@ def flatten_dict(d, parent_key='', sep='_'):
             items.append((new_key, v))
     return dict(items)
 
+class NoiseBuffer():
+    """ perturbations of shape `(max_steps, n_arms)` drawn lazily in blocks of `block_steps` rows
+
+    Only the current block (and the prefetched next one) is held in memory, so memory
+    is bounded by `block_steps * n_arms` instead of the whole horizon. Block `i` is drawn
+    from `SeedSequence(entropy, spawn_key=(i,))`, hence the stream is reproducible and
+    independent of the access order and of prefetching. With `prefetch=True` the next
+    block is drawn in a background thread while the current one is consumed, call `close`
+    or use the buffer as a context manager to stop the thread.
+
+    :param random_variable: frozen scipy distribution, e.g. `stats.gumbel_r()`
+    :param n_arms: number of arms, the width of a row
+    :param max_steps: number of rows
+    :param block_steps: number of rows drawn at once
+    :param dtype: dtype of the perturbations, e.g. `np.float32` to halve the memory
+    :param seed: seed of the stream, a fresh entropy is used if None
+    :param prefetch: draw the next block in a background thread
+    """
+
+    def __init__(self, random_variable, n_arms: int, max_steps: int, block_steps: int = 4096,
+                 dtype: np.dtype = np.float64, seed: Optional[int] = None, prefetch: bool = False) -> None:
+        assert block_steps > 0, f"block_steps has to be positive but is {block_steps}"
+        self.random_variable = random_variable
+        self.n_arms = n_arms
+        self.max_steps = max_steps
+        self.block_steps = block_steps
+        self.dtype = np.dtype(dtype)
+        self.entropy = np.random.SeedSequence(seed).entropy
+        self._executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+        self._next = None
+        self._block_index = -1
+        self._block = None
+
+    @property
+    def nbytes(self) -> int:
+        return self.block_steps * self.n_arms * self.dtype.itemsize
+
+    def draw_block(self, block_index: int) -> np.ndarray:
+        """ draw the rows `block_index * block_steps` up to the next block
+
+        Returns:
+            np.ndarray: perturbations of shape `(rows, n_arms)`, the last block may be shorter
+        """
+        rng = np.random.default_rng(np.random.SeedSequence(self.entropy, spawn_key=(block_index,)))
+        rows = min(self.block_steps, self.max_steps - block_index * self.block_steps)
+        block = self.random_variable.rvs(size=(rows, self.n_arms), random_state=rng)
+        return np.asarray(block, dtype=self.dtype)
+
+    def _load(self, block_index: int) -> None:
+        if self._next is not None and self._next[0] == block_index:
+            block = self._next[1].result()
+        else:
+            block = self.draw_block(block_index)
+        self._block_index, self._block = block_index, block
+        self._next = None
+        if self._executor is not None and (block_index + 1) * self.block_steps < self.max_steps:
+            self._next = (block_index + 1, self._executor.submit(self.draw_block, block_index + 1))
+
+    def __len__(self) -> int:
+        return self.max_steps
+
+    def _row(self, step: int) -> np.ndarray:
+        if not -self.max_steps <= step < self.max_steps:
+            raise IndexError(f"step {step} is out of range for {self.max_steps} steps")
+        step %= self.max_steps
+        block_index = step // self.block_steps
+        if block_index != self._block_index:
+            self._load(block_index)
+        return self._block[step - block_index * self.block_steps]
+
+    def _rows(self, steps: range) -> np.ndarray:
+        """ copy the rows `steps` block by block, every touched block is loaded once
+        """
+        stride = steps.step
+        result = np.empty((len(steps), self.n_arms), dtype=self.dtype)
+        position = 0
+        while position < len(steps):
+            block_index = steps[position] // self.block_steps
+            if block_index != self._block_index:
+                self._load(block_index)
+            block_start = block_index * self.block_steps
+            # part of the remaining steps which lies inside the current block
+            if stride > 0:
+                inside = range(steps[position], min(steps.stop, block_start + len(self._block)), stride)
+            else:
+                inside = range(steps[position], max(steps.stop, block_start - 1), stride)
+            first = inside.start - block_start
+            last = inside[-1] - block_start
+            end = last + 1 if stride > 0 else (last - 1 if last > 0 else None)
+            result[position:position + len(inside)] = self._block[first:end:stride]
+            position += len(inside)
+        return result
+
+    def __getitem__(self, key) -> np.ndarray:
+        """ index like the array of shape `(max_steps, n_arms)` of all perturbations
+
+        `noise[step]` is the row of all arms at `step`, `noise[step, arm]` a single value
+        and `noise[start:stop]` the rows of a range of steps. Negative steps count from the end.
+        """
+        step, rest = (key[0], key[1:]) if isinstance(key, tuple) else (key, ())
+        if isinstance(step, slice):
+            return self._rows(range(*step.indices(self.max_steps)))[(slice(None),) + rest]
+        if not isinstance(step, (int, np.integer)):
+            raise TypeError(f"steps have to be indexed by an int or a slice but not by {type(step)}")
+        return self._row(int(step))[rest]
+
+    def close(self) -> None:
+        """ stop the prefetch thread
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+            self._next = None
+
+    def __enter__(self) -> "NoiseBuffer":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __del__(self) -> None:
+        # do not block the garbage collection on a running draw
+        executor = getattr(self, "_executor", None)
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
 class BoltzmannGumbelRandomVariable(ABC):
     """ boltzmann exploration algorithm also known as softmax bandit
     """
 
-    def __init__(self,  n_arms, some_constant, max_steps, randomvariable_dict):
+    def __init__(self,  n_arms, some_constant, max_steps, randomvariable_dict, block_steps=4096,
+                 dtype=np.float64, seed=None, prefetch=False):
         """initialize boltzmann algorithm with constant temperature
 
         Args:
             temperature (float): float describing learning rate
             n_arms (int): number of used arms
+            block_steps (int, optional): steps of perturbations drawn at once. Defaults to 4096.
+            dtype (np.dtype, optional): dtype of the perturbations. Defaults to np.float64.
+            seed (int, optional): seed of the perturbations
+            prefetch (bool, optional): draw the next block of perturbations in a background thread
         """
         
         _dist = getattr(stats, randomvariable_dict["name"])
-        self.random_variable = _dist(
-            **randomvariable_dict["parameter"]).rvs(size=(max_steps, n_arms))
-    
+        # `self.random_variable[step]` are the perturbations of all arms at `step`
+        self.random_variable = NoiseBuffer(
+            _dist(**randomvariable_dict["parameter"]), n_arms, max_steps, block_steps=block_steps,
+            dtype=dtype, seed=seed, prefetch=prefetch)
+
+    def close(self):
+        """ stop the prefetch thread of the perturbations
+        """
+        self.random_variable.close()
+
     @abstractmethod
     def select_arm(self, *args,**kwargs):
         """ get action from boltzmann gumbel paper
@@ -103,4 +330,4 @@ class BoltzmannGumbelRandomVariable(ABC):
         
 
 if __name__=="__main__":
-    print(create_distributions(num_rep = 1))
\ No newline at end of file
+    print(create_distributions(num_rep = 1, rng=np.random.default_rng(seed=0)))
\ No newline at end of file
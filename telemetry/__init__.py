@@ -0,0 +1,2 @@
+""" latency histograms shared by the instrumentation of `firstmdp` and the serving wrapper of `bandits`
+"""
@@ -0,0 +1,50 @@
+import bisect
+
+import numpy as np
+
+# upper edges of the latency histogram in seconds, from 1 microsecond to 1 second
+LATENCY_BUCKETS = tuple(float(edge) for edge in np.logspace(-6, 0, 25))
+
+
+class LatencyStats():
+    """ counter and latency histogram of one kind of operation, e.g. a method or `select_arm`
+
+    :param buckets: upper edges of the histogram buckets in seconds, the last bucket
+        collects all slower operations
+    """
+
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS) -> None:
+        self.buckets = tuple(buckets)
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.histogram = [0] * (len(self.buckets) + 1)
+
+    def record(self, seconds: float) -> None:
+        self.calls += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.histogram[bisect.bisect_left(self.buckets, seconds)] += 1
+
+    def quantile(self, q: float) -> float:
+        """ upper bucket edge below which a fraction `q` of the operations lies
+        """
+        threshold = q * self.calls
+        cumulative = 0
+        for edge, count in zip(self.buckets + (self.max,), self.histogram):
+            cumulative += count
+            if cumulative >= threshold and count > 0:
+                return min(edge, self.max)
+        return self.max
+
+    def to_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "total_seconds": self.total,
+            "mean_seconds": self.total / self.calls if self.calls else 0.0,
+            "p50_seconds": self.quantile(0.5),
+            "p99_seconds": self.quantile(0.99),
+            "max_seconds": self.max,
+            "histogram": {"bucket_edges": list(self.buckets), "counts": list(self.histogram)},
+        }
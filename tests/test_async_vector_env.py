@@ -0,0 +1,23 @@
+import functools
+
+import numpy as np
+
+from firstmdp.Gridsearch import GridWorld
+from firstmdp.async_vector_env import AsyncVectorGridWorld
+
+
+def _rollout(num_workers, seed, num_envs=6, num_steps=50):
+    env_fn = functools.partial(GridWorld, slip=0.3)
+    actions = np.random.default_rng(seed=0).integers(4, size=(num_steps, num_envs))
+    with AsyncVectorGridWorld(num_envs=num_envs, size=5, num_workers=num_workers, seed=seed,
+                              env_fn=env_fn, context="spawn") as envs:
+        envs.reset()
+        return np.stack([envs.step(step_actions)[0] for step_actions in actions])
+
+
+def test_slippery_rollouts_are_reproducible():
+    observations = _rollout(num_workers=2, seed=7)
+    np.testing.assert_array_equal(observations, _rollout(num_workers=2, seed=7))
+    # every environment has its own stream, independent of the number of workers
+    np.testing.assert_array_equal(observations, _rollout(num_workers=3, seed=7))
+    assert not np.array_equal(observations, _rollout(num_workers=2, seed=8))
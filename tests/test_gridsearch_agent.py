@@ -0,0 +1,18 @@
+import numpy as np
+
+from firstmdp.gridsearch_agent import DetAgent
+
+
+def test_deterministic_policy_table_is_cached_until_update():
+    agent = DetAgent(policy_type="greedy", seed=0)
+    table = agent.policy
+    assert agent.policy is table and not table.flags.writeable
+    agent.policy_table.actions[0, 0] = 1
+    agent.update_policy_cache()
+    np.testing.assert_array_equal(agent.policy[0, 0], [0.0, 1.0, 0.0, 0.0])
+
+
+def test_assigned_policy_keeps_its_float_dtype():
+    agent = DetAgent(seed=0)
+    agent.policy = np.full((5, 5, 4), 0.25)
+    assert agent.policy.dtype == np.float64
@@ -0,0 +1,20 @@
+import numpy as np
+
+from firstmdp.Gridsearch import GridWorld
+
+
+def test_step_sees_in_place_edits_of_the_state():
+    env = GridWorld(size=5)
+    env.state[0] = 3
+    state, reward, done, _ = env.step(0)
+    np.testing.assert_array_equal(state, [4, 0])
+    assert (reward, done) == (-1, False)
+
+
+def test_step_keeps_the_invalid_action_handling():
+    env = GridWorld(size=5)
+    np.testing.assert_array_equal(env.step(1.0)[0], [0, 1])
+    for action in (None, "up", -1, 4, 2):
+        state, reward, done, _ = env.step(action)
+        np.testing.assert_array_equal(state, [0, 1])
+        assert (reward, done) == (0, False)
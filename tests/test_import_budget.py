@@ -0,0 +1,5 @@
+from benchmarks.bench_import import check_import_budget
+
+
+def test_importing_firstmdp_stays_within_budget():
+    assert check_import_budget() == []
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+import scipy.stats as stats
+
+from gumbel_exp.gumbel_exp_utils import NoiseBuffer
+
+
+def _all_rows(noise: NoiseBuffer) -> np.ndarray:
+    return np.concatenate([noise.draw_block(index) for index in range(-(-noise.max_steps // noise.block_steps))])
+
+
+@pytest.mark.parametrize("prefetch", [False, True])
+def test_blocks_do_not_depend_on_access_order_or_prefetch(prefetch):
+    expected = _all_rows(NoiseBuffer(stats.gumbel_r(), n_arms=3, max_steps=10, block_steps=4, seed=1))
+    assert expected.shape == (10, 3)
+    with NoiseBuffer(stats.gumbel_r(), n_arms=3, max_steps=10, block_steps=4, seed=1, prefetch=prefetch) as noise:
+        for step in (9, 0, 5, 4, 3, 8, 1):
+            np.testing.assert_array_equal(noise[step], expected[step])
+        np.testing.assert_array_equal(noise[-1, 2], expected[-1, 2])
+
+
+def test_last_block_is_shorter():
+    noise = NoiseBuffer(stats.gumbel_r(), n_arms=2, max_steps=10, block_steps=4, seed=0)
+    assert [noise.draw_block(index).shape for index in range(3)] == [(4, 2), (4, 2), (2, 2)]
+
+
+def test_slices_match_the_rows():
+    noise = NoiseBuffer(stats.gumbel_r(), n_arms=3, max_steps=10, block_steps=4, seed=2)
+    expected = _all_rows(noise)
+    for key in (slice(None), slice(2, 9), slice(3, 4), slice(1, 10, 3), slice(None, None, -1),
+                slice(8, 1, -3), slice(-3, None), slice(5, 2)):
+        np.testing.assert_array_equal(noise[key], expected[key])
+    np.testing.assert_array_equal(noise[2:7, 1], expected[2:7, 1])
+
+
+def test_out_of_range_steps_raise():
+    noise = NoiseBuffer(stats.gumbel_r(), n_arms=2, max_steps=5, block_steps=2, seed=0)
+    for step in (5, -6):
+        with pytest.raises(IndexError):
+            noise[step]
@@ -0,0 +1,22 @@
+import numpy as np
+
+from firstmdp.Gridsearch import GridWorld
+from firstmdp.planning import evaluate_policy, plan
+from firstmdp.trainer import train_tabular
+
+
+def test_train_tabular_default_settings_converge_to_plan():
+    env = GridWorld(size=5)
+    planned = plan(env)
+    result = train_tabular(env, seed=0)
+
+    finite = np.isfinite(result.q_values)
+    assert np.abs(result.q_values[finite]).max() <= np.abs(planned.values).max() + 1e-6
+    values = result.q_values.max(axis=-1)
+    np.testing.assert_allclose(values[0, 0], planned.values[0, 0], atol=0.05)
+
+    # the greedy policy of the learned values is optimal from the start state
+    actions = np.argmax(result.policy, axis=-1).ravel()
+    policy_values = evaluate_policy(env.transition_model, env.reward_table, actions, gamma=0.9,
+                                    terminal=env.terminal_states)
+    np.testing.assert_allclose(policy_values[0], planned.values[0, 0], atol=1e-6)
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from firstmdp.trajectory_buffer import TrajectoryBuffer
+
+
+def test_out_of_range_indices_raise():
+    buffer = TrajectoryBuffer(capacity=8)
+    for step in range(3):
+        buffer.add([0, step], 1, 0.0, [0, step + 1], done=False)
+    np.testing.assert_array_equal(buffer[-1]["state"], [0, 2])
+    for index in (3, 10, -4, -10):
+        with pytest.raises(IndexError):
+            buffer[index]
+    with pytest.raises(IndexError):
+        buffer[np.array([0, 5])]
+
+
+def test_episodes_are_split_per_environment(tmp_path):
+    # two environments, the second finishes every step and the first after three steps
+    buffer = TrajectoryBuffer(capacity=4, spill_dir=str(tmp_path))
+    for step in range(3):
+        buffer.add_batch(states=[[0, step], [5, 5]], actions=[1, 1], rewards=[0.0, 1.0],
+                         next_states=[[0, step + 1], [5, 6]], dones=[step == 2, True])
+    episodes = list(buffer.episodes())
+    assert len(episodes) == 4
+    for episode in episodes:
+        assert len(np.unique(episode["env_id"])) == 1
+        assert episode["flags"][-1] and not episode["flags"][:-1].any()
+    first_env = [episode for episode in episodes if episode["env_id"][0] == 0]
+    assert len(first_env) == 1
+    np.testing.assert_array_equal(first_env[0]["state"], [[0, 0], [0, 1], [0, 2]])
+
+
+def test_int_index_returns_a_single_record():
+    buffer = TrajectoryBuffer(capacity=4)
+    buffer.add([1, 2], 3, 0.5, [1, 3], done=True, env_id=7)
+    record = buffer[0]
+    assert record.shape == () and record["env_id"] == 7 and record["action"] == 3
+    assert buffer[np.int64(-1)]["reward"] == 0.5
+
+
+def test_values_which_do_not_fit_raise():
+    buffer = TrajectoryBuffer(capacity=4)
+    with pytest.raises(ValueError):
+        buffer.add([0, 40_000], 1, 0.0, [0, 1], done=False)
+    with pytest.raises(ValueError):
+        buffer.add([0, 0], 1, 0.0, [0, 1], done=False, env_id=70_000)
+    with pytest.raises(ValueError):
+        buffer.add_batch(states=np.zeros((2, 2), dtype=np.int64), actions=[0, 1], rewards=[0.0, 0.0],
+                         next_states=np.zeros((2, 2), dtype=np.int64), dones=[False, False],
+                         env_ids=np.array([0, -1]))
+    assert len(buffer) == 0
+
+
+def test_episodes_match_for_every_chunk_layout(tmp_path):
+    rng = np.random.default_rng(0)
+    states = rng.integers(0, 9, size=(60, 2))
+    env_ids = rng.integers(3, size=60)
+    dones = rng.random(60) < 0.3
+    in_memory = TrajectoryBuffer(capacity=60)
+    spilled = TrajectoryBuffer(capacity=7, spill_dir=str(tmp_path))
+    for buffer in (in_memory, spilled):
+        buffer.add_batch(states, np.zeros(60, dtype=int), np.zeros(60), states, dones, env_ids=env_ids)
+    expected = list(in_memory.episodes())
+    # a transition is part of a complete episode if its environment finishes later on
+    completed = [dones[step:][env_ids[step:] == env_ids[step]].any() for step in range(60)]
+    assert sum(len(episode) for episode in expected) == sum(completed)
+    for first, second in zip(expected, spilled.episodes(), strict=True):
+        assert first.tobytes() == second.tobytes()
@@ -0,0 +1,14 @@
+import numpy as np
+
+from firstmdp.vector_env import VectorGridWorld
+
+
+def test_out_of_range_actions_are_invalid():
+    for slip in (0.0, 0.2):
+        environments = VectorGridWorld(num_envs=4, size=5, slip=slip, seed=0)
+        environments.reset()
+        environments.positions[:] = [1, 1]
+        observations, rewards, dones, _ = environments.step(np.array([-1, 4, 7, -4]))
+        np.testing.assert_array_equal(observations, [[1, 1]] * 4)
+        np.testing.assert_array_equal(rewards, 0.0)
+        assert not dones.any()